@@ -0,0 +1,304 @@
+import os
+import time
+import numpy as np
+from path_solver import LayoutFromGrid
+from region_divider import RegionDivider
+from region_points_generator import column_fallback_row
+
+# 没有水平分隔线/交点时的填充值
+NO_POSITION = -1
+
+# 每次一起计算的布局数：有效网格和行前缀和只为一块布局分配，内存不随整批布局数增长
+BATCH_CHUNK_SIZE = 64
+
+
+def load_grid_batch(input_grids):
+    """
+    读取一批同尺寸网格：(batch, rows, cols) 数组，或保存该数组的 .npy 文件路径（只读内存映射），
+    也可以是同尺寸二维网格的列表；0表示可通行区域，1表示障碍物/边界
+    """
+    if isinstance(input_grids, (str, os.PathLike)):
+        grids = np.load(input_grids, mmap_mode='r')
+    elif isinstance(input_grids, np.ndarray):
+        grids = input_grids
+    else:
+        grids = np.stack([np.asarray(grid) for grid in input_grids])
+    if grids.ndim != 3:
+        raise ValueError(f"批量网格须为 (batch, rows, cols) 三维数组，实际为 {grids.ndim} 维")
+    return grids
+
+
+class BatchRegionDivider:
+    """
+    同尺寸布局的批量区域划分：与RegionDivider + build_strip_division的划分规则逐一相同，
+    但有效网格、列面积、行累计面积、分隔线位置和分隔线与边界的交点都沿batch轴整体用NumPy归约计算，
+    Python循环只随列数和块数而不随布局数增长；各布局的子区域端点由这些交点直接得到（见endpoints），不再逐个提取轮廓求交
+
+    布局按chunk_size个一块处理（内存映射的.npy每次只读入一块），每块的有效网格和行前缀和（int32，
+    单个布局少于2^31个网格）用完即释放；只有每个布局的列面积和各条带的逐行累计面积等结果按整批保存
+    """
+
+    def __init__(self, input_grids, chunk_size=BATCH_CHUNK_SIZE):
+        self.grids = load_grid_batch(input_grids)
+        self.batch, self.rows, self.cols = self.grids.shape
+        self.chunk_size = max(1, int(chunk_size))
+        # 当前块的有效网格（1表示可通行）及每行沿列方向的前缀和 (块大小, rows, cols+1)，由load_chunk设置
+        self.valid = None
+        self.row_prefix = None
+        self.valid_area = None
+        self.column_areas = None
+
+    def load_chunk(self, start, stop):
+        """读入第start~stop个布局，计算有效网格、有效面积、列面积和行前缀和"""
+        self.valid = (np.asarray(self.grids[start:stop]) == 0).astype(np.uint8)
+        self.valid_area = self.valid.sum(axis=(1, 2), dtype=np.int64)
+        # 每个布局每列的有效网格数 (块大小, cols)
+        self.column_areas = self.valid.sum(axis=1, dtype=np.int64)
+        # 任意条带的逐行面积由两列前缀和相减得到
+        self.row_prefix = np.zeros((len(self.valid), self.rows, self.cols + 1), dtype=np.int32)
+        np.cumsum(self.valid, axis=2, dtype=np.int32, out=self.row_prefix[:, :, 1:])
+
+    def generate_vertical_dividers(self, num_regions=5):
+        """
+        生成垂直分隔线（规则同RegionDivider.generate_vertical_dividers：从左向右累计列面积，
+        达到目标面积即放置分隔线并重新累计）
+
+        作用于当前块（load_chunk）
+
+        返回:
+            (bounds, counts)：bounds为 (块大小, 条带数+1) 的条带边界，依次为0、各分隔线和cols，
+            分隔线不足的布局以cols补齐（宽度为0的空条带）；counts为各布局的分隔线数
+        """
+        count = len(self.valid)
+        max_dividers = max(int(np.ceil(num_regions)) - 1, 0)
+        target = self.valid_area / num_regions
+        bounds = np.full((count, max_dividers + 2), self.cols, dtype=np.int64)
+        bounds[:, 0] = 0
+        counts = np.zeros(count, dtype=np.int64)
+        cumulative = np.zeros(count, dtype=np.int64)
+        layouts = np.arange(count)
+
+        for x in range(1, self.cols):
+            cumulative += self.column_areas[:, x - 1]
+            hit = (cumulative >= target) & (counts < max_dividers)
+            bounds[layouts[hit], counts[hit] + 1] = x
+            counts += hit
+            cumulative[hit] = 0
+
+        return bounds, counts
+
+    def strip_row_areas(self, bounds):
+        """各条带逐行的有效网格数 (块大小, rows, 条带数)"""
+        edges = np.take_along_axis(self.row_prefix, bounds[:, None, :], axis=2)
+        return np.diff(edges, axis=2)
+
+    def generate_horizontal_dividers(self, bounds):
+        """
+        为每个条带生成水平分隔线（规则同RegionDivider.generate_horizontal_dividers：
+        取上下两部分有效网格数之差最小的第一个行间位置）
+
+        返回:
+            (positions, row_cumulative)：positions为 (块大小, 条带数) 的分隔线行号，没有有效网格的条带为NO_POSITION；
+            row_cumulative为各条带从上到下的累计面积 (块大小, rows, 条带数)
+        """
+        row_cumulative = np.cumsum(self.strip_row_areas(bounds), axis=1)
+        totals = row_cumulative[:, -1, :]
+        positions = np.argmin(np.abs(2 * row_cumulative - totals[:, None, :]), axis=1) + 1
+        positions[totals == 0] = NO_POSITION
+        return positions, row_cumulative
+
+    def subregion_areas(self, positions, row_cumulative):
+        """
+        上下子区域面积 (块大小, 条带数, 2)，上下的含义同RegionPathGenerator：[..., 0]为'upper'（行号不小于分隔线），
+        [..., 1]为'lower'（行号小于分隔线）；没有水平分隔线的条带没有有效网格，两者都为0
+        """
+        totals = row_cumulative[:, -1, :]
+        rows = np.where(positions > 0, positions - 1, self.rows - 1)
+        lower = np.take_along_axis(row_cumulative, rows[:, None, :], axis=1)[:, 0, :]
+        return np.stack([totals - lower, lower], axis=2)
+
+    def vertical_crossings(self, bounds):
+        """
+        竖向分隔线与有效区域边界的交点（行号）(块大小, 条带数+1, 2)：分隔线所在列中行号最小和最大的有效网格，
+        即PathEndpointGenerator.find_intersection_points的栅格等价；该列没有有效网格或分隔线位于cols（在所有网格之外）为NO_POSITION
+        """
+        columns = np.minimum(bounds, self.cols - 1)
+        lines = np.take_along_axis(self.valid, columns[:, None, :], axis=2).astype(bool)
+        lines &= (bounds < self.cols)[:, None, :]
+        return self._extent(lines, axis=1)
+
+    def horizontal_crossings(self, bounds, positions):
+        """
+        水平分隔线与有效区域边界的交点（列号）(块大小, 条带数, 2)：分隔线所在行在条带范围内最左和最右的有效网格，
+        没有分隔线或该行在条带内没有有效网格为NO_POSITION
+        """
+        rows = np.clip(positions, 0, self.rows - 1)
+        lines = np.take_along_axis(self.valid, rows[:, :, None], axis=1).astype(bool)
+        columns = np.arange(self.cols)
+        inside = (columns >= bounds[:, :-1, None]) & (columns < bounds[:, 1:, None])
+        crossings = self._extent(lines & inside, axis=2)
+        crossings[positions == NO_POSITION] = NO_POSITION
+        return crossings
+
+    @staticmethod
+    def _extent(mask, axis):
+        """沿axis的第一个和最后一个True的位置，堆叠在最后一维；全为False时为NO_POSITION"""
+        length = mask.shape[axis]
+        first = np.argmax(mask, axis=axis)
+        last = length - 1 - np.argmax(np.flip(mask, axis=axis), axis=axis)
+        found = mask.any(axis=axis)
+        return np.stack([np.where(found, first, NO_POSITION), np.where(found, last, NO_POSITION)], axis=-1)
+
+    def divide(self, num_regions):
+        """
+        批量划分所有布局（条带数为 ceil(num_regions/2)，与build_strip_division相同）
+
+        返回:
+            字典，各项第一维为batch（各块结果按顺序拼接）：
+                valid_area: 有效网格总数
+                column_areas/column_cumulative: 每列有效网格数及其从左到右的累计
+                vertical_bounds/vertical_counts: 条带边界（见generate_vertical_dividers）和分隔线数
+                horizontal_dividers: 各条带水平分隔线行号
+                row_cumulative: 各条带从上到下的累计面积 (batch, rows, 条带数)
+                subregion_areas: 上下子区域面积 (batch, 条带数, 2)
+                vertical_crossings/horizontal_crossings: 分隔线与边界的交点（见对应方法）
+        """
+        start_time = time.time()
+        chunks = []
+        for start in range(0, self.batch, self.chunk_size):
+            self.load_chunk(start, min(start + self.chunk_size, self.batch))
+            bounds, counts = self.generate_vertical_dividers(np.ceil(num_regions / 2))
+            positions, row_cumulative = self.generate_horizontal_dividers(bounds)
+            chunks.append({
+                'valid_area': self.valid_area,
+                'column_areas': self.column_areas,
+                'column_cumulative': np.cumsum(self.column_areas, axis=1),
+                'vertical_bounds': bounds,
+                'vertical_counts': counts,
+                'horizontal_dividers': positions,
+                'row_cumulative': row_cumulative,
+                'subregion_areas': self.subregion_areas(positions, row_cumulative),
+                'vertical_crossings': self.vertical_crossings(bounds),
+                'horizontal_crossings': self.horizontal_crossings(bounds, positions),
+            })
+        # 释放最后一块的中间数组
+        self.valid = self.row_prefix = None
+        result = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]} if chunks else {}
+        print(f"批量划分 {self.batch} 个布局完成（每块 {self.chunk_size} 个），耗时: {time.time() - start_time:.3f}秒")
+        return result
+
+    def division(self, result, index):
+        """
+        取出第index个布局的划分，格式同RegionDivider：
+        (竖向分隔线列表, [(x_min, x_max, 水平分隔线行号), ...])
+        """
+        count = int(result['vertical_counts'][index])
+        bounds = result['vertical_bounds'][index, :count + 2].tolist()
+        positions = result['horizontal_dividers'][index]
+        horizontal_dividers = [(bounds[k], bounds[k + 1], int(positions[k]))
+                               for k in range(count + 1) if positions[k] != NO_POSITION]
+        return bounds[1:-1], horizontal_dividers
+
+    def endpoints(self, result, index):
+        """
+        由批量算出的分隔线交点得到第index个布局各子区域的端点，格式和规则同
+        PathEndpointGenerator.generate_endpoints_for_all_regions，但不提取轮廓、不做几何求交：
+        竖向分隔线的交点为该列最下/最上的有效网格，水平分隔线与边界的交点在最左侧条带取该行最左、
+        在最右侧条带取最右的有效网格。边界轮廓与分隔线只相交于孤立点时与逐个布局的结果相同；
+        轮廓有一段与竖向分隔线重合时，shapely求交得到线段而丢弃交点、逐个布局只能取回退坐标，这里仍取该列真实的交点；
+        布局有多块可通行区域时其他区域的网格也算作边界（轮廓只取最大的一块）
+        """
+        count = int(result['vertical_counts'][index])
+        bounds = result['vertical_bounds'][index, :count + 2].tolist()
+        positions = result['horizontal_dividers'][index]
+        vertical_crossings = result['vertical_crossings'][index]
+        horizontal_crossings = result['horizontal_crossings'][index]
+        grid = self.grids[index]
+
+        def fallback_row(column, position):
+            column = min(max(int(column), 0), self.cols - 1)
+            return column_fallback_row(np.asarray(grid[:, column]) == 0, position)
+
+        def vertical_points(k):
+            # 与边界的交点从上到下排列（同find_intersection_points），只有一个有效网格时为一个点
+            bottom, top = vertical_crossings[k]
+            if bottom == NO_POSITION:
+                return []
+            return [(float(bounds[k]), float(y)) for y in sorted({int(bottom), int(top)}, reverse=True)]
+
+        last = count + 1
+        all_endpoints = []
+        for k in range(last):
+            x_min, x_max = bounds[k], bounds[k + 1]
+            region_num = k + 1
+            left, right = vertical_points(k), vertical_points(k + 1)
+
+            if positions[k] == NO_POSITION:
+                # 没有水平分隔线，整个区域作为一个整体：左侧最上方到右侧最下方
+                if left and right:
+                    start_point, end_point = max(left, key=lambda p: p[1]), min(right, key=lambda p: p[1])
+                else:
+                    start_point = (x_min, fallback_row(x_min, 'middle'))
+                    end_point = (x_max, fallback_row(x_max - 1, 'middle'))
+                all_endpoints.append({'region': region_num, 'subregion': 'whole',
+                                      'start': start_point, 'end': end_point})
+                continue
+
+            y_pos = int(positions[k])
+            leftmost, rightmost = horizontal_crossings[k]
+            upper_left = [p for p in left if p[1] >= y_pos]
+            lower_left = [p for p in left if p[1] <= y_pos]
+            upper_right = [p for p in right if p[1] >= y_pos]
+            lower_right = [p for p in right if p[1] <= y_pos]
+
+            if region_num == 1:
+                # 最左侧区域：上下子区域共享水平分隔线与左边界的交点
+                if leftmost != NO_POSITION:
+                    upper_start = lower_start = (float(leftmost), float(y_pos))
+                elif left:
+                    upper_start = lower_start = left[0]
+                else:
+                    upper_start = lower_start = (x_min, fallback_row(x_min, 'middle'))
+                if upper_right:
+                    upper_end = max(upper_right, key=lambda p: p[1])
+                else:
+                    upper_end = (x_max, max(p[1] for p in right) if right else fallback_row(x_max - 1, 'top'))
+                lower_end = (min(lower_right, key=lambda p: p[1]) if lower_right
+                             else (x_max, fallback_row(x_max - 1, 'bottom')))
+
+            elif region_num == last:
+                # 最右侧区域：上下子区域共享水平分隔线与右边界的交点
+                if rightmost != NO_POSITION:
+                    upper_end = lower_start = (float(rightmost), float(y_pos))
+                elif right:
+                    upper_end = lower_start = right[0]
+                else:
+                    upper_end = lower_start = (x_max, fallback_row(x_max - 1, 'middle'))
+                upper_start = (max(upper_left, key=lambda p: p[1]) if upper_left
+                               else (x_min, fallback_row(x_min, 'top')))
+                lower_end = (min(lower_left, key=lambda p: p[1]) if lower_left
+                             else (x_min, fallback_row(x_min, 'bottom')))
+
+            else:
+                # 一般区域：上下子区域都从左向右
+                upper_start = max(upper_left, key=lambda p: p[1]) if upper_left else (x_min, y_pos)
+                upper_end = max(upper_right, key=lambda p: p[1]) if upper_right else (x_max, y_pos)
+                lower_start = min(lower_left, key=lambda p: p[1]) if lower_left else (x_min, y_pos)
+                lower_end = min(lower_right, key=lambda p: p[1]) if lower_right else (x_max, y_pos)
+
+            all_endpoints.append({'region': region_num, 'subregion': 'upper', 'start': upper_start, 'end': upper_end})
+            all_endpoints.append({'region': region_num, 'subregion': 'lower', 'start': lower_start, 'end': lower_end})
+
+        return all_endpoints
+
+    def build_strip_division(self, result, index):
+        """
+        把第index个布局的批量划分结果接入子区域求解：返回值同path_solver.build_strip_division，
+        可直接用于创建RegionPathGenerator并调用generate_all_region_paths。
+        端点由批量算出的交点得到（见endpoints），不创建PathEndpointGenerator，返回的端点生成器为None（不做候选端点搜索）
+        """
+        layout_manager = LayoutFromGrid((np.asarray(self.grids[index]) != 0).astype(np.uint8))
+        divider = RegionDivider(layout_manager)
+        vertical_dividers, horizontal_dividers = self.division(result, index)
+        all_endpoints = self.endpoints(result, index)
+        return divider, vertical_dividers, horizontal_dividers, None, all_endpoints
@@ -0,0 +1,220 @@
+import json
+import time
+import numpy as np
+from collections import deque
+
+
+# 特征向量各维的含义（顺序与代价模型系数一致）
+FEATURE_NAMES = ['bias', 'log_free_cells', 'obstacle_density', 'obstacle_free', 'holes',
+                 'parity_ok', 'endpoint_distance', 'endpoints_adjacent', 'same_side']
+
+# 未指定覆盖率目标时，用于判定引擎"成功"的覆盖率(%)
+SELECTION_COVERAGE = 95.0
+
+# 默认代价模型系数：由 benchmark_engines 在300个随机子区域（4~24格边长、0~8%随机障碍物、部分带圆角边界、起终点在边界上且多在角上，
+# 不设覆盖率目标、展开节点数上限同auto策略）上的测量结果经 fit_cost_model 拟合得到
+# time: log(耗时秒数) 的线性模型；success: 成功概率的线性模型（截断到[0.02, 0.98]）
+DEFAULT_COST_MODEL = {
+    'hamilton': {
+        'time': [-10.8234, 0.966, 7.8741, 0.0832, 0.0192, -0.2924, -2.0394, 1.9191, 0.0485],
+        'success': [0.0788, -0.015, -0.1801, -0.0037, 0.001, -0.0067, 0.0014, -0.015, 0.0078],
+    },
+    'hamilton_restart': {
+        'time': [-8.2357, 1.0753, 4.2952, 0.1376, 0.0063, -0.0803, -0.6718, 0.7001, -0.0867],
+        'success': [0.1539, -0.0263, -0.4174, -0.0107, 0.0019, -0.0133, -0.0118, -0.0313, 0.0114],
+    },
+    'bidirectional': {
+        'time': [-15.0681, 1.3459, 6.8361, -1.5194, -0.0388, 6.6679, -0.0148, -0.7888, -0.0614],
+        'success': [0.1866, -0.0309, -1.231, 0.268, 0.0028, 0.5472, -0.0138, -0.0541, 0.0061],
+    },
+    'meander': {
+        'time': [-12.6316, 1.0246, 0.1002, -0.0732, -0.0076, 0.1917, -0.2625, -0.2882, -0.0912],
+        'success': [-0.1366, 0.0162, 0.2563, 0.1736, -0.0015, 0.0383, 0.0488, -0.0693, 0.0356],
+    },
+    'stc': {
+        'time': [-10.6409, 0.6335, 2.4327, 0.219, 0.0162, 0.0263, -0.0181, -0.0592, 0.0305],
+        'success': [-0.0238, 0.0314, 0.029, 0.1175, -0.0021, -0.0018, -0.1624, 0.0917, -0.0246],
+    },
+    'frontier': {
+        'time': [0.5906, -1.6112, -5.8308, -0.1005, -0.0182, -0.4322, 0.7724, -0.1845, 0.0704],
+        'success': [2.7434, -0.4487, -6.1122, -0.0902, 0.0171, -0.074, 0.0598, -0.0566, 0.018],
+    },
+}
+
+# 引擎选择日志：内存中保留最近的记录，设置 SELECTION_LOG_PATH 后同时以JSON行追加写入文件
+SELECTION_LOG = deque(maxlen=1000)
+SELECTION_LOG_PATH = None
+
+
+def count_holes(grid):
+    """统计不与区域边界相连的障碍物连通块（孔洞）数量"""
+    rows, cols = grid.shape
+    seen = np.zeros((rows, cols), dtype=bool)
+    holes = 0
+    for i, j in np.argwhere(grid == 1).tolist():
+        if seen[i, j]:
+            continue
+        # BFS遍历该障碍物连通块，检查是否触及边界
+        seen[i, j] = True
+        queue = deque([(i, j)])
+        touches_border = False
+        while queue:
+            ci, cj = queue.popleft()
+            if ci in (0, rows - 1) or cj in (0, cols - 1):
+                touches_border = True
+            for di, dj in ((0, 1), (1, 0), (0, -1), (-1, 0)):
+                ni, nj = ci + di, cj + dj
+                if 0 <= ni < rows and 0 <= nj < cols and grid[ni, nj] == 1 and not seen[ni, nj]:
+                    seen[ni, nj] = True
+                    queue.append((ni, nj))
+        if not touches_border:
+            holes += 1
+    return holes
+
+
+def parity_feasible(grid, start, target):
+    """按棋盘着色判断是否可能存在覆盖全部可通行网格的起点→终点路径"""
+    rows, cols = grid.shape
+    colors = np.add.outer(np.arange(rows), np.arange(cols)) % 2
+    free = grid == 0
+    even = int(np.sum(free & (colors == 0)))
+    odd = int(np.sum(free & (colors == 1)))
+    start_color = (start[0] + start[1]) % 2
+    target_color = (target[0] + target[1]) % 2
+    if start_color != target_color:
+        return even == odd
+    # 起终点同色时，该颜色的网格数必须比另一种多一个
+    return (even - odd) == (1 if start_color == 0 else -1)
+
+
+def subregion_features(grid, start, target):
+    """计算子区域的特征：可通行网格数、障碍物密度、孔洞数、奇偶平衡及起终点位置"""
+    rows, cols = grid.shape
+    free_cells = int(np.sum(grid == 0))
+
+    def sides(cell):
+        i, j = cell
+        return {side for side, on in (('top', i == 0), ('bottom', i == rows - 1),
+                                      ('left', j == 0), ('right', j == cols - 1)) if on}
+
+    distance = abs(start[0] - target[0]) + abs(start[1] - target[1])
+    return {
+        'free_cells': free_cells,
+        'log_free_cells': float(np.log(max(free_cells, 1))),
+        'obstacle_density': 1 - free_cells / (rows * cols),
+        'obstacle_free': float(free_cells == rows * cols),
+        'holes': count_holes(grid),
+        'parity_ok': float(parity_feasible(grid, start, target)),
+        'endpoint_distance': distance / max(rows + cols - 2, 1),
+        'endpoints_adjacent': float(distance == 1),
+        'same_side': float(bool(sides(start) & sides(target))),
+    }
+
+
+def feature_vector(features):
+    """将特征字典转换为与代价模型系数对应的向量"""
+    return np.array([1.0] + [features[name] for name in FEATURE_NAMES[1:]])
+
+
+def predict_cost(engine, features, cost_model=None):
+    """预测引擎在该子区域上的(耗时秒数, 成功概率)，没有系数的引擎视为未知（耗时1秒，成功概率0.5）"""
+    coeffs = (cost_model or DEFAULT_COST_MODEL).get(engine)
+    if coeffs is None:
+        return 1.0, 0.5
+    x = feature_vector(features)
+    expected_time = float(np.exp(np.dot(coeffs['time'], x)))
+    success = float(np.clip(np.dot(coeffs['success'], x), 0.02, 0.98))
+    return expected_time, success
+
+
+def select_engine(engines, features, cost_model=None):
+    """
+    从候选引擎中选择期望代价（预测耗时 / 成功概率）最低的引擎
+
+    返回:
+        (引擎名称, 各引擎预测值{名称: (耗时, 成功概率)})
+    """
+    predictions = {engine: predict_cost(engine, features, cost_model) for engine in engines}
+    best = min(predictions, key=lambda e: predictions[e][0] / predictions[e][1])
+    return best, predictions
+
+
+def log_decision(record):
+    """记录一次引擎选择决策及其结果"""
+    SELECTION_LOG.append(record)
+    if SELECTION_LOG_PATH:
+        with open(SELECTION_LOG_PATH, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def load_selection_log(path):
+    """读取JSON行格式的引擎选择日志/基准测试记录"""
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def fit_cost_model(records):
+    """
+    用最小二乘从基准测试或决策日志记录中拟合代价模型系数
+
+    每条记录需包含 'engine'、'features'、'time'（秒）和 'success'（布尔值）；
+    记录全部成功或全部失败的引擎无法拟合成功概率，不写入模型，预测时按未知引擎处理（见predict_cost）
+    """
+    by_engine = {}
+    for record in records:
+        by_engine.setdefault(record['engine'], []).append(record)
+
+    cost_model = {}
+    for engine, engine_records in by_engine.items():
+        X = np.array([feature_vector(r['features']) for r in engine_records])
+        log_times = np.log(np.maximum([r['time'] for r in engine_records], 1e-4))
+        successes = np.array([float(r['success']) for r in engine_records])
+        if successes.min() == successes.max():
+            print(f"代价模型拟合：引擎 {engine} 的 {len(engine_records)} 条记录全部{'成功' if successes[0] else '失败'}，不拟合该引擎")
+            continue
+
+        # 加入少量岭回归正则，避免特征共线时系数发散
+        ridge = 1e-3 * np.eye(X.shape[1])
+        gram = X.T @ X + ridge
+        cost_model[engine] = {
+            'time': np.linalg.solve(gram, X.T @ log_times).round(4).tolist(),
+            'success': np.linalg.solve(gram, X.T @ successes).round(4).tolist(),
+        }
+    return cost_model
+
+
+def benchmark_engines(solver_factory, cases, engines, log_path=None):
+    """
+    在一组子区域上运行各引擎并记录耗时和结果，作为 fit_cost_model 的输入
+
+    参数:
+        solver_factory: 根据 (rows, cols, obstacles, start, target) 创建路径生成器的函数
+        cases: [(rows, cols, obstacles, start, target), ...]
+        engines: 要测试的引擎名称列表
+        log_path: 若提供，记录以JSON行追加写入该文件
+    """
+    records = []
+    for rows, cols, obstacles, start, target in cases:
+        for engine in engines:
+            solver = solver_factory(rows, cols, obstacles, start, target)
+            features = subregion_features(solver.grid, start, target)
+            begin = time.time()
+            try:
+                path = solver.run_engine(engine)
+            except Exception as e:
+                print(f"基准测试：引擎 {engine} 运行失败: {e!r}")
+                path = []
+            elapsed = time.time() - begin
+            records.append({
+                'engine': engine,
+                'features': features,
+                'time': elapsed,
+                'success': bool(solver.is_successful_path(path)),
+                'coverage': float(solver.calculate_coverage(path)),
+            })
+
+    if log_path:
+        with open(log_path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return records
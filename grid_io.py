@@ -0,0 +1,75 @@
+import os
+import numpy as np
+
+# 分块处理大网格时每块的行数
+TILE_ROWS = 1024
+
+
+def load_grid(input_grid):
+    """
+    读取输入网格：.npy 文件路径以只读内存映射方式打开（不把整张网格读入内存），
+    numpy数组直接使用，其余（列表的列表）转换为numpy数组
+
+    .npy 网格须为 uint8 或 bool 类型，0表示可通行区域，1表示障碍物/边界
+    """
+    if isinstance(input_grid, (str, os.PathLike)):
+        grid = np.load(input_grid, mmap_mode='r')
+        if grid.ndim != 2 or grid.dtype not in (np.uint8, np.bool_):
+            raise ValueError(f"网格文件须为二维uint8或bool数组，实际为 {grid.ndim} 维 {grid.dtype}")
+    elif isinstance(input_grid, np.ndarray):
+        grid = input_grid
+    else:
+        return np.array(input_grid)
+
+    # bool 网格按 uint8 解释（不复制），以便做算术运算
+    if grid.dtype == np.bool_:
+        grid = grid.view(np.uint8)
+    return grid
+
+
+def valid_grid_of(grid):
+    """有效网格（1表示可通行）：内存映射网格返回按需反转的视图，其他网格直接计算 1 - grid"""
+    if isinstance(grid, np.memmap):
+        return ValidGridView(grid)
+    return 1 - grid
+
+
+class ValidGridView:
+    """
+    障碍物网格的只读反转视图：切片时才读取并反转对应部分，求和按行分块进行，
+    峰值内存取决于所取的子区域而不是整张网格
+    """
+
+    def __init__(self, grid, tile_rows=TILE_ROWS):
+        self.grid = grid
+        self.tile_rows = tile_rows
+        self.shape = grid.shape
+        self.ndim = grid.ndim
+        self.dtype = np.dtype(np.uint8)
+
+    def __getitem__(self, key):
+        return (np.asarray(self.grid[key]) == 0).astype(np.uint8)
+
+    def __array__(self, dtype=None, copy=None):
+        # 整张网格反转（仅在确实需要全图时使用）
+        full = self[:, :]
+        return full if dtype is None else full.astype(dtype)
+
+    def tiles(self):
+        """按行分块遍历，产出 (起始行, 有效网格块)"""
+        for r0 in range(0, self.shape[0], self.tile_rows):
+            yield r0, self[r0:r0 + self.tile_rows]
+
+    def sum(self, axis=None, dtype=None, out=None, **kwargs):
+        """分块求和，支持 axis=None/0/1"""
+        if axis is None:
+            total = sum(int(tile.sum(dtype=np.int64)) for _, tile in self.tiles())
+        elif axis in (0, -2):
+            total = np.zeros(self.shape[1], dtype=np.int64)
+            for _, tile in self.tiles():
+                total += tile.sum(axis=0, dtype=np.int64)
+        elif axis in (1, -1):
+            total = np.concatenate([tile.sum(axis=1, dtype=np.int64) for _, tile in self.tiles()])
+        else:
+            raise ValueError(f"不支持的求和轴: {axis}")
+        return total if dtype is None else np.asarray(total, dtype=dtype)
@@ -1,10 +1,98 @@
 import numpy as np
 import time
-from collections import deque
+import random
+import multiprocessing
+import queue as queue_module
+from collections import deque, OrderedDict
+from engine_selector import SELECTION_COVERAGE, subregion_features, select_engine, log_decision
+from search_trace import SearchTrace
+
+# 路径生成引擎注册表：策略名称 -> 方法名，由 @register_engine 填充
+# 注册后的引擎自动参与代价模型选择('auto')和组合求解('portfolio')，无需修改调度代码
+ENGINE_REGISTRY = {}
+
+# 组合求解(portfolio)模式的截止时间（秒），默认并发运行所有已注册的引擎
+PORTFOLIO_DEADLINE = 30.0
+
+# 随机重启：每次重启的展开节点数上限为 RESTART_BASE_FACTOR × 可通行网格数 × Luby序列项
+RESTART_BASE_FACTOR = 4
+RESTART_MAX_COUNT = 64
+
+# 代价模型选择依次尝试引擎时，DFS展开节点数上限为 AUTO_NODE_LIMIT_FACTOR × 可通行网格数，避免退化为指数级搜索
+AUTO_NODE_LIMIT_FACTOR = 1000
+
+# 代价模型选择中所有引擎都不可行时，从这些引擎的结果中取尽力而为的路径
+FALLBACK_ENGINES = ('stc', 'meander')
+
+# 路径扩展局部搜索的默认时间预算（秒）
+EXTEND_BUDGET = 5.0
+
+# 哈密顿DFS失败状态置换表的容量（条目数），满后按最近最少使用淘汰；0表示不使用置换表
+FAILURE_TABLE_SIZE = 200000
+# 轮廓动态规划引擎：窄边宽度不超过 FRONTIER_MAX_WIDTH 的子区域自动采用；
+# 单步状态数超过 FRONTIER_MAX_STATES 时放弃（返回空路径），避免内存失控
+FRONTIER_MAX_WIDTH = 8
+FRONTIER_MAX_STATES = 20000
+
+# 路径数组的坐标类型：各引擎返回 (N, 2) 数组，每行为(行, 列)
+PATH_DTYPE = np.int32
+
+# 生成Zobrist随机键的固定种子，保证同一子区域的哈希值可复现
+ZOBRIST_SEED = 0x5EED
+
+
+class _SearchLimitReached(Exception):
+    """DFS展开节点数超出本次重启的上限"""
+
+    def __init__(self, expansions):
+        super().__init__(expansions)
+        self.expansions = expansions
+
+
+def luby(i):
+    """Luby序列的第i项（从1开始）：1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8, ..."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    if i == (1 << k) - 1:
+        return 1 << (k - 1)
+    # 去掉前一个完整的子序列
+    return luby(i - (1 << (k - 1)) + 1)
+
+
+def as_path_array(path):
+    """把路径（(行, 列)元组列表或数组）转换为 (N, 2) int32 数组"""
+    return np.asarray(path, dtype=PATH_DTYPE).reshape(-1, 2)
+
+
+def register_engine(name):
+    """将ObstacleAwareLongestPath的方法注册为名为name的路径生成引擎"""
+    def decorator(method):
+        ENGINE_REGISTRY[name] = method.__name__
+        return method
+    return decorator
+
+
+def _portfolio_worker(rows, cols, obstacles, start, target, max_length, min_coverage, strategy, result_queue):
+    """组合求解的工作进程：用指定策略求解同一子区域，并把结果放入结果队列；任何异常都上报空结果"""
+    try:
+        solver = ObstacleAwareLongestPath(rows, cols, obstacles, start, target,
+                                          max_length=max_length, min_coverage=min_coverage)
+        path = solver.run_engine(strategy)
+    except Exception as e:
+        # 失败的策略也要上报，避免主进程空等到截止时间
+        print(f"策略 {strategy} 运行失败: {e!r}")
+        path = []
+    result_queue.put((strategy, as_path_array(path)))
 
 
 class ObstacleAwareLongestPath:
-    def __init__(self, rows, cols, obstacles, start, target):
+    def __init__(self, rows, cols, obstacles, start, target, seed=0, max_length=None, min_coverage=None):
+        """
+        参数:
+            max_length: 管道长度上限（路径网格数），None表示不限
+            min_coverage: 覆盖率目标（百分比），搜索得到满足该目标的路径后立即停止；None表示到达终点即停止
+        """
         self.rows = rows
         self.cols = cols
         self.grid = np.zeros((rows, cols), dtype=int)
@@ -18,39 +106,152 @@ class ObstacleAwareLongestPath:
         # 设置起点和终点
         self.start = start
         self.target = target
+        self.obstacles = list(obstacles)
+
+        # 随机重启的种子；node_limit为DFS展开节点数上限（None表示不限）
+        self.seed = seed
+        self.node_limit = None
+
+        # 管道长度上限与覆盖率目标
+        self.max_length = max_length
+        self.min_coverage = min_coverage
 
         # 性能监控
         self.time_tracking = {}
+        self.search_stats = {}
+
+        # 哈密顿DFS的失败状态置换表：Zobrist哈希 -> None，按最近最少使用排序；
+        # 随机重启之间共享，已证明无解的状态在后续重启中直接剪枝
+        self.failure_table = OrderedDict()
+        self.failure_table_size = FAILURE_TABLE_SIZE
+        self._zobrist_keys = None
+
+        # 搜索轨迹记录器（见enable_trace），默认关闭
+        self.trace = None
 
         self.available_grids = np.sum(self.grid == 0)
 
     def calculate_coverage(self, path):
         """计算路径覆盖率"""
-        total_available = np.sum(self.grid == 0)
-        if not path or total_available == 0:
+        total_available = self.available_grids
+        if len(path) == 0 or total_available == 0:
             return 0.0
 
-        # 计算路径覆盖的网格数（不重复计算）
-        path_cells = set()
+        # 路径覆盖的网格数（不重复计算）
+        coverage = (self.covered_cells(path) / total_available) * 100
+        return coverage
 
-        for cell in path:
-            path_cells.add(cell)
+    def flat_indices(self, path):
+        """路径各点在网格中的一维索引 i * cols + j"""
+        cells = as_path_array(path)
+        return cells[:, 0].astype(np.int64) * self.cols + cells[:, 1]
 
-        coverage = (len(path_cells) / total_available) * 100
-        return coverage
+    def covered_cells(self, path):
+        """路径覆盖的不重复网格数"""
+        if len(path) == 0:
+            return 0
+        return int(np.unique(self.flat_indices(path)).size)
+
+    def enable_trace(self, **kwargs):
+        """为哈密顿DFS启用搜索轨迹记录，返回SearchTrace（参数见SearchTrace）"""
+        self.trace = SearchTrace(self.rows, self.cols, self.obstacles, **kwargs)
+        return self.trace
 
     def is_valid_cell(self, i, j):
         """检查单元格是否有效（在网格内且不是障碍物）"""
         return 0 <= i < self.rows and 0 <= j < self.cols and self.grid[i, j] == 0
 
+    @register_engine('hamilton')
     def hamilton_path(self):
         """生成哈密顿路径，确保覆盖尽可能多的网格而不交叉"""
         print("生成哈密顿路径...")
         start_time = time.time()
 
+        success, path, expansions = self._hamilton_search() #todo:没成功怎么处理？
+        self.search_stats["expansions"] = expansions
+
+        # if not success:
+        #     print("警告：无法找到从起点到终点的哈密顿路径！回退到简单路径...")
+        #     # 如果DFS失败，尝试简单路径
+        #     path = self.meander_path()
+
+        print(f"哈密顿路径生成完成，路径长度为 {len(path)}")
+        self.time_tracking["哈密顿路径生成"] = time.time() - start_time
+        return path
+
+    @register_engine('hamilton_restart')
+    def hamilton_restart_path(self, seed=None, base_limit=None, max_restarts=RESTART_MAX_COUNT):
+        """
+        带随机重启的哈密顿路径：每次重启以不同种子随机打破启发式排序中的平局，
+        展开节点数上限按Luby序列(1,1,2,1,1,2,4,...)乘以base_limit增长，结果可由seed复现
+
+        未设置覆盖率目标时以SELECTION_COVERAGE为重启目标：到达终点但覆盖率不足的路径同样触发重启，
+        返回各次重启中最长的路径
+        """
+        print("生成哈密顿路径（随机重启）...")
+        start_time = time.time()
+
+        if seed is None:
+            seed = self.seed
+        if base_limit is None:
+            base_limit = RESTART_BASE_FACTOR * max(1, int(self.available_grids))
+
+        # 设置了覆盖率目标时由搜索本身保证，否则到达终点的路径还需覆盖不少于SELECTION_COVERAGE的网格
+        goal_cells = 0
+        if self.min_coverage is None:
+            goal_cells = int(np.ceil(self.available_grids * SELECTION_COVERAGE / 100))
+
+        path, winning_seed, total_expansions = [], None, 0
+        restarts = 0
+        for restarts in range(1, max_restarts + 1):
+            restart_seed = seed + restarts - 1
+            node_limit = base_limit * luby(restarts)
+            try:
+                success, found, expansions = self._hamilton_search(node_limit, random.Random(restart_seed))
+            except _SearchLimitReached as e:
+                total_expansions += e.expansions
+                continue
+
+            total_expansions += expansions
+            if not success:
+                # 未达到上限就搜索完毕说明不存在路径，换种子也无济于事
+                print("警告：搜索空间已穷尽，不存在从起点到终点的路径！")
+                break
+            if len(found) > len(path):
+                path, winning_seed = found, restart_seed
+            if len(found) >= goal_cells:
+                break
+        else:
+            if winning_seed is None:
+                print(f"警告：{max_restarts} 次重启后仍未找到路径！")
+            else:
+                print(f"警告：{max_restarts} 次重启后覆盖率仍低于 {SELECTION_COVERAGE}%，取最长的路径")
+
+        self.search_stats.update({
+            "seed": seed,
+            "restarts": restarts,
+            "winning_seed": winning_seed,
+            "expansions": total_expansions,
+        })
+        print(f"哈密顿路径生成完成，路径长度为 {len(path)}，重启次数 {restarts}，胜出种子 {winning_seed}")
+        self.time_tracking["哈密顿路径生成"] = time.time() - start_time
+        return path
+
+    def _hamilton_search(self, node_limit=None, rng=None):
+        """
+        哈密顿路径的深度优先搜索，返回(是否成功, 路径, 展开节点数)
+
+        参数:
+            node_limit: 展开节点数上限，超出时抛出_SearchLimitReached；None表示使用self.node_limit
+            rng: random.Random实例，用于随机打破启发式排序中的平局；None表示确定性顺序
+        """
+        if node_limit is None:
+            node_limit = self.node_limit
+
         # 创建访问标记和路径记录
         visited = np.zeros((self.rows, self.cols), dtype=bool)
         path = []
+        expansions = 0
 
         # 标记障碍物为已访问
         for i in range(self.rows):
@@ -64,19 +265,72 @@ class ObstacleAwareLongestPath:
         # 预处理：标记从给定位置无法到达终点的点为已访问
         target_i, target_j = self.target
 
+        # 达到覆盖率目标所需的最少网格数；有长度上限时，启发式的"前70%"以长度上限为准
+        min_cells = self.min_cells()
+        sweep_length = self.rows * self.cols
+        if self.max_length is not None:
+            sweep_length = min(sweep_length, self.max_length)
+
+        # 失败状态置换表：状态由(当前网格, 已访问集合)决定，路径长度即已访问网格数，
+        # 因此同一状态的搜索结果与到达该状态的路线无关，已穷尽失败的状态可直接剪枝
+        table = self.failure_table
+        table_size = self.failure_table_size
+        visit_keys, cell_keys = self.zobrist_keys()
+        visited_hash = 0
+        table_hits = 0
+        trace = self.trace
+
+        def fail(i, j, state):
+            """回溯当前网格，并把已穷尽的失败状态记入置换表"""
+            nonlocal visited_hash
+            if trace is not None:
+                trace.backtrack(i, j)
+            path.pop()
+            visited[i, j] = False
+            visited_hash ^= visit_keys[i][j]
+            if table_size:
+                table[state] = None
+                if len(table) > table_size:
+                    table.popitem(last=False)
+            return False
+
         # 使用DFS生成哈密顿路径
         def dfs(i, j):
+            nonlocal expansions, visited_hash, table_hits
+
             # 如果当前位置无效或已访问，返回False
             if not (0 <= i < self.rows and 0 <= j < self.cols) or visited[i, j]:
                 return False
 
+            # 增量更新已访问集合的哈希，与当前网格的键组合为状态哈希
+            visited_hash ^= visit_keys[i][j]
+            state = visited_hash ^ cell_keys[i][j]
+            if state in table:
+                table_hits += 1
+                table.move_to_end(state)
+                visited_hash ^= visit_keys[i][j]
+                return False
+
             # 标记当前位置为已访问
             visited[i, j] = True
             path.append((i, j))
 
+            expansions += 1
+            if trace is not None:
+                trace.expand(i, j, len(path))
+            if node_limit is not None and expansions > node_limit:
+                raise _SearchLimitReached(expansions)
+
             # 如果已经到达终点
             if (i, j) == self.target:
-                return True
+                if len(path) >= min_cells:
+                    return True
+                # 覆盖率未达到目标，终点不能作为中间点，回溯
+                return fail(i, j, state)
+
+            # 剪枝：该分支已不可能在长度上限内达到覆盖率目标
+            if self._cannot_meet_targets(i, j, len(path), visited, min_cells):
+                return fail(i, j, state)
 
             # 按照蛇形模式尝试四个方向
             # 计算到终点的曼哈顿距离作为启发式，优先选择远离终点的方向
@@ -88,9 +342,13 @@ class ObstacleAwareLongestPath:
                     dist_to_target = abs(ni - target_i) + abs(nj - target_j)
                     dirs_with_heuristic.append((d, dist_to_target))
 
+            # 随机打乱后再做稳定排序，相当于随机打破距离相同的平局
+            if rng is not None:
+                rng.shuffle(dirs_with_heuristic)
+
             # 按照到终点的距离排序，优先选择更远的方向（除非已经接近终点）
             # 如果路径长度很短，我们希望接近终点；否则希望远离终点
-            if len(path) < self.rows * self.cols * 0.7:  # 路径还不够长
+            if len(path) < sweep_length * 0.7:  # 路径还不够长
                 dirs_with_heuristic.sort(key=lambda x: -x[1])  # 优先选择远离终点的方向
             else:
                 dirs_with_heuristic.sort(key=lambda x: x[1])  # 优先选择接近终点的方向
@@ -103,23 +361,171 @@ class ObstacleAwareLongestPath:
                     return True
 
             # 如果无法继续，回溯
-            path.pop()
-            visited[i, j] = False
-            return False
+            return fail(i, j, state)
 
-        # 从起点开始DFS
-        start_i, start_j = self.start 
-        success = dfs(start_i, start_j) #todo:没成功怎么处理？
+        # 从起点开始DFS；超出展开上限时也要记录置换表统计
+        start_i, start_j = self.start
+        try:
+            success = dfs(start_i, start_j)
+        finally:
+            self.search_stats["tt_hits"] = self.search_stats.get("tt_hits", 0) + table_hits
+            self.search_stats["tt_size"] = len(table)
+        return success, path, expansions
 
-        # if not success:
-        #     print("警告：无法找到从起点到终点的哈密顿路径！回退到简单路径...")
-        #     # 如果DFS失败，尝试简单路径
-        #     path = self.meander_path()
+    @register_engine('bidirectional')
+    def bidirectional_path(self):
+        """
+        双向搜索：从起点和终点同时延伸两条部分路径，轮流扩展，共享访问标记，
+        两端路径头相邻且已覆盖足够网格（覆盖率目标，未指定时为全部可通行网格）时在中间拼接；
+        终点附近的错误选择在浅层就会被连通性检查发现，搜索深度约为单向DFS的一半
+        """
+        print("生成双向搜索路径...")
+        start_time = time.time()
 
-        print(f"哈密顿路径生成完成，路径长度为 {len(path)}")
-        self.time_tracking["哈密顿路径生成"] = time.time() - start_time
+        success, path, expansions = self._bidirectional_search()
+        if not success:
+            print("警告：双向搜索未找到满足覆盖目标的路径！")
+        self.search_stats["expansions"] = expansions
+
+        print(f"双向搜索路径生成完成，路径长度为 {len(path)}")
+        self.time_tracking["双向搜索路径生成"] = time.time() - start_time
         return path
 
+    def _bidirectional_search(self, node_limit=None):
+        """
+        双向深度优先搜索，返回(是否成功, 路径, 展开节点数)；node_limit含义同_hamilton_search
+
+        两条部分路径的总网格数为偶数时扩展起点一侧，否则扩展终点一侧；
+        任何完整路径中间尚未确定的一段都从两端路径头的邻格开始，因此轮流扩展不会漏掉解
+        """
+        if node_limit is None:
+            node_limit = self.node_limit
+
+        start, target = tuple(self.start), tuple(self.target)
+        if start == target:
+            return True, [start], 1
+
+        visited = self.grid == 1
+        visited[start] = visited[target] = True
+        sides = ([start], [target])
+        expansions = 0
+
+        # 拼接所需的最少网格数：覆盖率目标，未指定时要求覆盖全部可通行网格
+        goal = self.min_cells() or int(self.available_grids)
+        directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+        def free_neighbors(i, j):
+            return [(i + di, j + dj) for di, dj in directions
+                    if 0 <= i + di < self.rows and 0 <= j + dj < self.cols and not visited[i + di, j + dj]]
+
+        def dead(total):
+            """两端路径头之间已不可能在长度上限内连出足够长的中间段"""
+            (ai, aj), (bi, bj) = sides[0][-1], sides[1][-1]
+            # 以另一端的路径头为终点做连通性与奇偶检查，该路径头暂时视为未访问
+            visited[bi, bj] = False
+            try:
+                return self._cannot_meet_targets(ai, aj, total - 1, visited, goal, target=(bi, bj))
+            finally:
+                visited[bi, bj] = True
+
+        def search():
+            nonlocal expansions
+            total = len(sides[0]) + len(sides[1])
+            (ai, aj), (bi, bj) = sides[0][-1], sides[1][-1]
+            if abs(ai - bi) + abs(aj - bj) == 1 and total >= goal:
+                return True
+            if dead(total):
+                return False
+
+            side = sides[total % 2]
+            other_i, other_j = sides[1 - total % 2][-1]
+            i, j = side[-1]
+
+            # 优先走向出路最少的邻格（Warnsdorff规则），相同时远离另一端路径头
+            moves = free_neighbors(i, j)
+            moves.sort(key=lambda c: (len(free_neighbors(*c)), -abs(c[0] - other_i) - abs(c[1] - other_j)))
+            for ni, nj in moves:
+                expansions += 1
+                if node_limit is not None and expansions > node_limit:
+                    raise _SearchLimitReached(expansions)
+                visited[ni, nj] = True
+                side.append((ni, nj))
+                if search():
+                    return True
+                side.pop()
+                visited[ni, nj] = False
+            return False
+
+        if not search():
+            return False, [], expansions
+        self.search_stats["meet_depth"] = len(sides[0])
+        return True, sides[0] + sides[1][::-1], expansions
+
+    def zobrist_keys(self):
+        """
+        每个网格的两组64位Zobrist随机键（嵌套列表，按[i][j]取用）：
+        已访问集合的哈希为其中网格的访问键异或和，状态哈希再异或当前网格的位置键
+        """
+        if self._zobrist_keys is None:
+            rng = np.random.default_rng(ZOBRIST_SEED)
+            keys = rng.integers(0, 2 ** 63, size=(2, self.rows, self.cols), dtype=np.int64, endpoint=False)
+            self._zobrist_keys = (keys[0].tolist(), keys[1].tolist())
+        return self._zobrist_keys
+
+    def min_cells(self):
+        """达到覆盖率目标所需的最少路径网格数"""
+        if self.min_coverage is None:
+            return 0
+        return int(np.ceil(self.available_grids * self.min_coverage / 100))
+
+    def _cannot_meet_targets(self, i, j, length, visited, min_cells, target=None):
+        """
+        判断从(i, j)继续延伸的分支是否已不可能在长度上限内到达终点并达到覆盖率目标；
+        target为None时终点为self.target（双向搜索中为另一端的路径头）
+        """
+        if target is None:
+            target = self.target
+        target_i, target_j = target
+
+        # 即使直奔终点也会超出长度上限
+        if self.max_length is not None and length + abs(i - target_i) + abs(j - target_j) > self.max_length:
+            return True
+
+        if not min_cells:
+            return False
+
+        # 按棋盘着色统计从当前位置可达的未访问网格数，终点不可达时剪枝
+        seen = {(i, j)}
+        queue = deque([(i, j)])
+        color_counts = [0, 0]
+        target_reached = False
+        while queue:
+            ci, cj = queue.popleft()
+            for di, dj in ((0, 1), (1, 0), (0, -1), (-1, 0)):
+                ni, nj = ci + di, cj + dj
+                if 0 <= ni < self.rows and 0 <= nj < self.cols and not visited[ni, nj] and (ni, nj) not in seen:
+                    seen.add((ni, nj))
+                    queue.append((ni, nj))
+                    color_counts[(ni + nj) % 2] += 1
+                    target_reached = target_reached or (ni, nj) == target
+        if not target_reached:
+            return True
+
+        # 剩余路径黑白交替：从与当前网格异色的网格开始，到终点结束，据此得到可覆盖网格数的上界
+        first = (i + j + 1) % 2
+        if first == (target_i + target_j) % 2:
+            remaining = 2 * min(color_counts[first] - 1, color_counts[1 - first]) + 1
+        else:
+            remaining = 2 * min(color_counts[first], color_counts[1 - first])
+        return length + remaining < min_cells
+
+    def meets_targets(self, path):
+        """检查路径是否满足长度上限和覆盖率目标"""
+        if self.max_length is not None and len(path) > self.max_length:
+            return False
+        return self.min_coverage is None or self.covered_cells(path) >= self.min_cells()
+
+    @register_engine('meander')
     def meander_path(self):
         """根据起点和终点位置生成优化的蛇形路径"""
         print("生成蛇形路径...")
@@ -218,26 +624,722 @@ class ObstacleAwareLongestPath:
         self.time_tracking["蛇形路径生成"] = time.time() - start_time
         return path
 
-    def generate_longest_path(self):
-        """根据障碍物情况选择路径生成策略"""
+    @register_engine('stc')
+    def spanning_tree_path(self):
+        """生成树覆盖(STC)路径：在2×2粗网格上构建生成树并绕行，运行时间与网格数呈线性关系"""
+        print("生成生成树覆盖路径...")
+        start_time = time.time()
+
+        free = self.grid == 0
+
+        # 选择粗网格的偏移量，使完整的2×2块数量最多
+        best_offset, best_blocks = (0, 0), None
+        for oi in (0, 1):
+            for oj in (0, 1):
+                blocks = self._coarse_blocks(free, oi, oj)
+                if best_blocks is None or blocks.sum() > best_blocks.sum():
+                    best_offset, best_blocks = (oi, oj), blocks
+
+        if best_blocks is None or not best_blocks.any():
+            print("警告：区域内没有完整的2×2块，回退到蛇形路径...")
+            path = self.meander_path()
+            self.time_tracking["生成树覆盖路径生成"] = time.time() - start_time
+            # 蛇形路径不避让障碍物，经过障碍物或重复网格时不采用
+            return path if self.is_clear_path(path) else []
+
+        # 在粗网格上构建生成树，并沿生成树绕行得到一个哈密顿回路
+        tree_edges, in_tree = self._coarse_spanning_tree(best_blocks, best_offset)
+        succ, pred = self._circumnavigate(tree_edges, in_tree, best_offset)
+
+        # 处理障碍物边缘的残缺块：把相邻的未覆盖网格成对插入回路
+        self._insert_detours(succ, pred, free)
+
+        # 在起点/终点处切开回路
+        path = self._cut_cycle(succ, pred, free)
+        if not self.is_clear_path(path):
+            print("警告：生成树回路切开后的路径无效，放弃该结果！")
+            path = []
+
+        print(f"生成树覆盖路径生成完成，路径长度为 {len(path)}")
+        self.time_tracking["生成树覆盖路径生成"] = time.time() - start_time
+        return path
+
+    def _coarse_blocks(self, free, oi, oj):
+        """按偏移量(oi, oj)将网格粗化为2×2块，返回每个块是否完全可通行"""
+        sub = free[oi:, oj:]
+        block_rows, block_cols = sub.shape[0] // 2, sub.shape[1] // 2
+        sub = sub[:block_rows * 2, :block_cols * 2]
+        return sub.reshape(block_rows, 2, block_cols, 2).all(axis=(1, 3))
+
+    def _coarse_spanning_tree(self, blocks, offset):
+        """在粗网格上构建生成树（优先沿当前方向延伸以减少拐弯），返回(树边列表, 树中块的标记)"""
+        block_rows, block_cols = blocks.shape
+        oi, oj = offset
+
+        # 以离起点最近的块作为根节点
+        start_i, start_j = self.start
+        candidates = np.argwhere(blocks)
+        centers = candidates * 2 + np.array([oi, oj]) + 0.5
+        dists = np.abs(centers[:, 0] - start_i) + np.abs(centers[:, 1] - start_j)
+        root = tuple(candidates[np.argmin(dists)].tolist())
+
+        directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+        in_tree = np.zeros_like(blocks, dtype=bool)
+        tree_edges = []
+
+        # 迭代DFS：当前方向最后入栈，从而最先出栈，使树枝尽量笔直
+        stack = [(root, None, None)]
+        while stack:
+            block, parent, direction = stack.pop()
+            if in_tree[block]:
+                continue
+            in_tree[block] = True
+            if parent is not None:
+                tree_edges.append((parent, block))
+
+            bi, bj = block
+            ordered = [d for d in directions if d != direction]
+            if direction is not None:
+                ordered.append(direction)
+            for di, dj in ordered:
+                ni, nj = bi + di, bj + dj
+                if 0 <= ni < block_rows and 0 <= nj < block_cols and blocks[ni, nj] and not in_tree[ni, nj]:
+                    stack.append(((ni, nj), block, (di, dj)))
+
+        # 与根节点不连通的块不在树中，其网格留给残缺块处理
+        return tree_edges, in_tree
+
+    def _circumnavigate(self, tree_edges, in_tree, offset):
+        """沿生成树绕行，构造覆盖所有树中块网格的回路，返回后继与前驱映射"""
+        oi, oj = offset
+
+        def cells(block):
+            bi, bj = block
+            i, j = oi + bi * 2, oj + bj * 2
+            # 左上、右上、左下、右下
+            return (i, j), (i, j + 1), (i + 1, j), (i + 1, j + 1)
+
+        # 记录每个块在四个方向上是否有树边
+        linked = {}
+        adjacency = {}
+
+        def connect(a, b):
+            adjacency.setdefault(a, []).append(b)
+            adjacency.setdefault(b, []).append(a)
+
+        for a, b in tree_edges:
+            if a > b:
+                a, b = b, a
+            if a[0] == b[0]:  # 水平相邻，a在左
+                linked[(a, 'right')] = linked[(b, 'left')] = True
+                _, a_tr, _, a_br = cells(a)
+                b_tl, _, b_bl, _ = cells(b)
+                connect(a_tr, b_tl)
+                connect(a_br, b_bl)
+            else:  # 垂直相邻，a在上
+                linked[(a, 'down')] = linked[(b, 'up')] = True
+                _, _, a_bl, a_br = cells(a)
+                b_tl, b_tr, _, _ = cells(b)
+                connect(a_bl, b_tl)
+                connect(a_br, b_tr)
+
+        for block in map(tuple, np.argwhere(in_tree).tolist()):
+            tl, tr, bl, br = cells(block)
+            if not linked.get((block, 'up')):
+                connect(tl, tr)
+            if not linked.get((block, 'down')):
+                connect(bl, br)
+            if not linked.get((block, 'left')):
+                connect(tl, bl)
+            if not linked.get((block, 'right')):
+                connect(tr, br)
+
+        # 沿回路遍历，确定方向
+        succ, pred = {}, {}
+        first = next(iter(adjacency))
+        prev, curr = first, adjacency[first][0]
+        succ[first], pred[curr] = curr, first
+        while curr != first:
+            a, b = adjacency[curr]
+            nxt = a if b == prev else b
+            succ[curr], pred[nxt] = nxt, curr
+            prev, curr = curr, nxt
+
+        return succ, pred
+
+    def _insert_detours(self, succ, pred, free, deadline=None, limit=None):
+        """
+        绕行插入：将未覆盖的相邻网格对(u, v)插入路径/回路边(a, b)，得到 a→u→v→b，
+        直到没有可插入的网格对、超过截止时间或插入网格数将超过limit，返回插入的网格数
+
+        succ/pred为以网格为键的后继/前驱映射（开放路径的首尾分别以None作为前驱/后继）
+        """
+        directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+        def neighbors(cell):
+            i, j = cell
+            for di, dj in directions:
+                ni, nj = i + di, j + dj
+                if 0 <= ni < self.rows and 0 <= nj < self.cols and free[ni, nj]:
+                    yield ni, nj
+
+        def adjacent(a, b):
+            return b is not None and abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1
+
+        inserted_count = 0
+        queue = deque(cell for cell in map(tuple, np.argwhere(free).tolist()) if cell not in succ)
+        while queue:
+            if deadline is not None and time.time() > deadline:
+                print("绕行插入超出时间预算，提前结束")
+                break
+            if limit is not None and inserted_count + 2 > limit:
+                break
+
+            u = queue.popleft()
+            if u in succ:
+                continue
+            inserted = None
+            for v in neighbors(u):
+                if v in succ:
+                    continue
+                for a in neighbors(u):
+                    if a not in succ:
+                        continue
+                    b = succ[a]
+                    if adjacent(v, b):
+                        succ[a], succ[u], succ[v] = u, v, b
+                        pred[u], pred[v], pred[b] = a, u, v
+                        inserted = v
+                        break
+                    b = pred[a]
+                    if adjacent(v, b):
+                        succ[b], succ[v], succ[u] = v, u, a
+                        pred[v], pred[u], pred[a] = b, v, u
+                        inserted = v
+                        break
+                if inserted:
+                    break
+
+            # 新插入的网格可能使其邻居成为可插入的网格
+            if inserted:
+                inserted_count += 2
+                for cell in (u, inserted):
+                    queue.extend(n for n in neighbors(cell) if n not in succ)
+
+        return inserted_count
+
+    @register_engine('frontier')
+    def frontier_path(self, max_width=FRONTIER_MAX_WIDTH, max_states=FRONTIER_MAX_STATES):
+        """
+        轮廓(broken-profile)动态规划：沿长边逐格扫描，以窄边上的插头连通性轮廓为状态，
+        求从起点到终点、不超过长度上限的最长简单路径；耗时与长度成线性，只随窄边宽度指数增长。
+        结果是精确最优解：最长路径仍达不到覆盖率目标（或终点不可达）时，
+        在search_stats中记录 proven_infeasible，而不是像DFS那样搜索到超时
+        """
+        print("生成轮廓动态规划路径...")
+        start_time = time.time()
+
+        width = min(self.rows, self.cols)
+        if width > max_width:
+            print(f"警告：区域窄边宽度 {width} 超过轮廓动态规划上限 {max_width}，跳过")
+            self.time_tracking["轮廓动态规划路径生成"] = time.time() - start_time
+            return []
+
+        result = self._frontier_search(max_states)
+        if result is None:
+            print(f"警告：轮廓状态数超过上限 {max_states}，放弃轮廓动态规划")
+            self.search_stats["frontier_exact"] = False
+            path = []
+        else:
+            path = result
+            self.search_stats["frontier_exact"] = True
+            self.search_stats["proven_infeasible"] = not path or len(path) < self.min_cells()
+            if not path:
+                print("警告：起点和终点之间不存在路径！")
+            elif self.search_stats["proven_infeasible"]:
+                print(f"警告：最长路径为 {len(path)} 格，无法达到覆盖率目标 {self.min_coverage}%")
+
+        print(f"轮廓动态规划路径生成完成，路径长度为 {len(path)}")
+        self.time_tracking["轮廓动态规划路径生成"] = time.time() - start_time
+        return path
+
+    def _frontier_search(self, max_states):
+        """
+        轮廓动态规划的主循环，返回最长路径（无路径时为空列表），状态数超限时返回None
+
+        轮廓有 宽度+1 个插头：处理第j列网格前，插头j是左侧网格伸来的右插头，插头j+1是上方网格伸来的下插头；
+        处理后插头j变为本网格的下插头，插头j+1变为本网格的右插头。插头取值：
+        0 无插头，1/2 路径片段两端（按轮廓顺序成对，类似括号），3 通向起点或终点的片段的开放端
+        """
+        # 以短边为宽度扫描
+        transposed = self.cols > self.rows
+        grid = self.grid.T if transposed else self.grid
+        length, width = grid.shape
+        start = tuple(self.start[::-1]) if transposed else tuple(self.start)
+        target = tuple(self.target[::-1]) if transposed else tuple(self.target)
+        free = (grid == 0).tolist()
+        if start == target:
+            return [tuple(self.start)] if free[start[0]][start[1]] else []
+
+        # 长度上限起作用时，同一轮廓的不同长度不能互相支配，状态键中带上长度；
+        # 此时再用剩余网格数剪掉已不可能达到覆盖率目标的状态，控制状态数
+        cap = self.max_length
+        if cap is not None and cap >= self.available_grids:
+            cap = None
+        min_cells = self.min_cells() if cap is not None else 0
+        remaining_free = np.cumsum((grid == 0).ravel()[::-1])[::-1].tolist() + [0]
+
+        down_bit, right_bit = 1, 2
+        initial = (0,) * (width + 1)
+        states = {(initial if cap is None else (initial, 0)): 0}
+        history = []
+        best = None  # (长度, 完成步, 前一状态键)
+        peak_states = 1
+
+        def partner(profile, pos):
+            """与pos处的1/2插头配对的另一端位置"""
+            step = 1 if profile[pos] == 1 else -1
+            depth = 0
+            k = pos
+            while True:
+                if profile[k] == 1:
+                    depth += 1
+                elif profile[k] == 2:
+                    depth -= 1
+                if depth == 0:
+                    return k
+                k += step
+
+        for cell_index in range(length * width):
+            i, j = divmod(cell_index, width)
+            can_down = i + 1 < length and free[i + 1][j]
+            can_right = j + 1 < width and free[i][j + 1]
+            is_free = free[i][j]
+            is_end = (i, j) == start or (i, j) == target
+            nxt, back = {}, {}
+
+            def push(profile, new_length, prev_key, bits):
+                if cap is None:
+                    if nxt.get(profile, -1) >= new_length:
+                        return
+                    key = profile
+                else:
+                    key = (profile, new_length)
+                    if key in nxt:
+                        return
+                nxt[key] = new_length
+                back[key] = (prev_key, bits)
+
+            for key, cur in states.items():
+                if cur + remaining_free[cell_index] < min_cells:
+                    continue
+                profile = key if cap is None else key[0]
+                if j == 0:
+                    # 换行：上一行最后一格不会产生右插头，整体右移一位
+                    profile = (0,) + profile[:width]
+                left, up = profile[j], profile[j + 1]
+
+                if not is_free:
+                    if not left and not up:
+                        push(profile, cur, key, 0)
+                    continue
+
+                grow = cap is None or cur + 1 <= cap
+                if not left and not up:
+                    if not is_end:
+                        # 不经过该网格
+                        push(profile, cur, key, 0)
+                        if grow and can_down and can_right:
+                            push(profile[:j] + (1, 2) + profile[j + 2:], cur + 1, key, down_bit | right_bit)
+                    elif grow:
+                        # 端点从这里出发
+                        if can_down:
+                            push(profile[:j] + (3, 0) + profile[j + 2:], cur + 1, key, down_bit)
+                        if can_right:
+                            push(profile[:j] + (0, 3) + profile[j + 2:], cur + 1, key, right_bit)
+                    continue
+
+                if not grow:
+                    continue
+
+                if left and up:
+                    # 两个插头在此汇合；端点只能有一个插头
+                    if is_end or (left == 1 and up == 2):
+                        continue  # 端点度数超过1，或闭合成环
+                    merged = list(profile)
+                    merged[j] = merged[j + 1] = 0
+                    if left == 3 and up == 3:
+                        # 起点和终点连通，路径完成，轮廓中不能再有其他片段
+                        if not any(merged) and (best is None or cur + 1 > best[0]):
+                            best = (cur + 1, cell_index, key)
+                        continue
+                    if left == 1 and up == 1:
+                        merged[partner(profile, j + 1)] = 1
+                    elif left == 2 and up == 2:
+                        merged[partner(profile, j)] = 2
+                    elif left == 3:
+                        merged[partner(profile, j + 1)] = 3
+                    elif up == 3:
+                        merged[partner(profile, j)] = 3
+                    push(tuple(merged), cur + 1, key, 0)
+                    continue
+
+                plug = left or up
+                if is_end:
+                    # 片段在端点处终止
+                    ended = list(profile)
+                    ended[j] = ended[j + 1] = 0
+                    if plug == 3:
+                        if not any(ended) and (best is None or cur + 1 > best[0]):
+                            best = (cur + 1, cell_index, key)
+                        continue
+                    ended[partner(profile, j if left else j + 1)] = 3
+                    push(tuple(ended), cur + 1, key, 0)
+                    continue
+
+                # 片段穿过该网格，继续向下或向右
+                if can_down:
+                    push(profile[:j] + (plug, 0) + profile[j + 2:], cur + 1, key, down_bit)
+                if can_right:
+                    push(profile[:j] + (0, plug) + profile[j + 2:], cur + 1, key, right_bit)
+
+            if len(nxt) > max_states:
+                return None
+            peak_states = max(peak_states, len(nxt))
+            history.append(back)
+            states = nxt
+
+        self.search_stats["frontier_states"] = peak_states
+        if best is None or best[0] < min_cells:
+            return []
+
+        # 回溯每个网格伸出的下/右边，再从起点沿边走出路径
+        _, done_index, key = best
+        bits_of = {}
+        for cell_index in range(done_index - 1, -1, -1):
+            key, bits = history[cell_index][key]
+            if bits:
+                bits_of[divmod(cell_index, width)] = bits
+        neighbors = {}
+        for (i, j), bits in bits_of.items():
+            for bit, other in ((down_bit, (i + 1, j)), (right_bit, (i, j + 1))):
+                if bits & bit:
+                    neighbors.setdefault((i, j), []).append(other)
+                    neighbors.setdefault(other, []).append((i, j))
+
+        path = [start]
+        previous = None
+        while path[-1] != target:
+            current = path[-1]
+            following = next(n for n in neighbors[current] if n != previous)
+            previous = current
+            path.append(following)
+        if transposed:
+            path = [(j, i) for i, j in path]
+        return path
+
+    def extend_path(self, path, budget=EXTEND_BUDGET):
+        """
+        路径扩展局部搜索：对已有路径反复应用绕行插入，把相邻的未访问网格拉入路径，
+        直到没有可用的插入或超过时间预算(秒)，起点和终点保持不变
+        """
+        if len(path) == 0 or not self.is_valid_path(path):
+            return path
+
+        print("扩展路径覆盖...")
+        start_time = time.time()
+
+        # 以网格为键的前驱/后继映射，插入操作为O(1)
+        path = [tuple(cell) for cell in as_path_array(path).tolist()]
+        succ = dict(zip(path, path[1:] + [None]))
+        pred = dict(zip(path, [None] + path[:-1]))
+
+        free = self.grid == 0
+        # 有长度上限时，插入的网格数不能使路径超出上限
+        limit = None if self.max_length is None else max(0, self.max_length - len(path))
+        inserted = self._insert_detours(succ, pred, free, deadline=start_time + budget, limit=limit)
+
+        extended = [path[0]]
+        while succ[extended[-1]] is not None:
+            extended.append(succ[extended[-1]])
+
+        self.search_stats["extended_cells"] = inserted
+        self.time_tracking["路径扩展"] = time.time() - start_time
+        print(f"路径扩展完成，新增 {inserted} 个网格，路径长度为 {len(extended)}")
+        return extended
+
+    def _cut_cycle(self, succ, pred, free):
+        """在起点和终点处切开回路，取两段弧中不超出长度上限的较长一段，必要时从回路外连接起终点"""
+        start, target = tuple(self.start), tuple(self.target)
+
+        # 起点/终点不在回路上时，经由回路外的可通行网格连接到回路；起点的连接不能经过终点
+        prefix, entry = self._attach_to_cycle(start, succ, free, blocked={target})
+        suffix, exit_cell = self._attach_to_cycle(target, succ, free, blocked=set(prefix) | {entry})
+        if entry is None or exit_cell is None or entry == exit_cell:
+            print("警告：起点或终点无法连接到回路！")
+            return prefix + ([entry] if entry is not None else [])
+
+        # 沿两个方向分别走到出口，取不超出长度上限的较长弧（都超出时取较短弧）
+        arcs = []
+        for step in (succ, pred):
+            arc = [entry]
+            while arc[-1] != exit_cell:
+                arc.append(step[arc[-1]])
+            arcs.append(arc)
+        arcs.sort(key=len, reverse=True)
+        arc = arcs[0]
+        if self.max_length is not None and len(prefix) + len(arc) + len(suffix) > self.max_length:
+            arc = arcs[1]
+
+        return prefix + arc + suffix[::-1]
+
+    def _attach_to_cycle(self, endpoint, succ, free, blocked):
+        """BFS寻找从端点到回路的最短连接，返回(回路外的连接网格列表, 回路入口网格)"""
+        if endpoint in succ and endpoint not in blocked:
+            return [], endpoint
+
+        directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+        parents = {endpoint: None}
+        queue = deque([endpoint])
+        while queue:
+            cell = queue.popleft()
+            i, j = cell
+            for di, dj in directions:
+                n = (i + di, j + dj)
+                if not (0 <= n[0] < self.rows and 0 <= n[1] < self.cols) or not free[n]:
+                    continue
+                if n in parents or n in blocked:
+                    continue
+                if n in succ:
+                    # 回溯得到从端点到当前网格的连接路径
+                    link = [cell]
+                    while parents[link[-1]] is not None:
+                        link.append(parents[link[-1]])
+                    return link[::-1], n
+                parents[n] = cell
+                queue.append(n)
+
+        return [endpoint], None
+
+    def portfolio_path(self, strategies=None, deadline=PORTFOLIO_DEADLINE):
+        """
+        组合求解：在多个工作进程中并发运行多种策略，取第一个完全覆盖（或达到覆盖率目标）的有效路径，
+        到截止时间仍没有时取覆盖率最高的有效路径，其余进程全部终止；strategies为None时运行所有已注册的引擎
+        """
+        if strategies is None:
+            strategies = tuple(ENGINE_REGISTRY)
+        print(f"组合求解，并发运行策略: {', '.join(strategies)}...")
+        start_time = time.time()
+
+        result_queue = multiprocessing.Queue()
+        workers = {}
+        for strategy in strategies:
+            worker = multiprocessing.Process(
+                target=_portfolio_worker,
+                args=(self.rows, self.cols, self.obstacles, self.start, self.target,
+                      self.max_length, self.min_coverage, strategy, result_queue),
+                daemon=True)
+            worker.start()
+            workers[strategy] = worker
+
+        best_path, best_strategy, best_coverage = None, None, -1.0
+        finished = []
+        try:
+            while len(finished) < len(workers):
+                remaining = deadline - (time.time() - start_time)
+                if remaining <= 0:
+                    print("组合求解到达截止时间，取当前最优结果")
+                    break
+                try:
+                    strategy, path = result_queue.get(timeout=remaining)
+                except queue_module.Empty:
+                    continue
+                finished.append(strategy)
+
+                if not self.is_feasible_path(path):
+                    continue
+                coverage = self.calculate_coverage(path)
+                if coverage > best_coverage:
+                    best_path, best_strategy, best_coverage = path, strategy, coverage
+                if coverage >= 100.0 or (self.min_coverage is not None and self.meets_targets(path)):
+                    break
+        finally:
+            # 取消其余仍在运行的策略
+            for worker in workers.values():
+                if worker.is_alive():
+                    worker.terminate()
+            for worker in workers.values():
+                worker.join()
+            result_queue.close()
+
+        self.time_tracking["组合求解"] = time.time() - start_time
+        self.time_tracking["组合求解胜出策略"] = best_strategy
+        if best_path is None:
+            print("警告：组合求解没有得到有效路径！回退到蛇形路径...")
+            return as_path_array(self.meander_path())
+
+        print(f"组合求解完成，胜出策略: {best_strategy}，覆盖率: {best_coverage:.1f}%")
+        return best_path
+
+    def run_engine(self, name):
+        """运行已注册的路径生成引擎，返回 (N, 2) int32 路径数组"""
+        return as_path_array(getattr(self, ENGINE_REGISTRY[name])())
+
+    def is_successful_path(self, path):
+        """引擎选择意义上的成功：路径可行、满足约束，且未指定覆盖率目标时覆盖率不低于SELECTION_COVERAGE"""
+        if not self.is_feasible_path(path) or not self.meets_targets(path):
+            return False
+        return self.min_coverage is not None or self.calculate_coverage(path) >= SELECTION_COVERAGE
+
+    def cost_model_path(self, engines=None):
+        """
+        代价模型选择：根据子区域特征预测各引擎的耗时和成功概率，按期望代价从低到高依次运行，
+        直到某个引擎成功；都不成功时取覆盖率最高的可行路径。每次决策及其结果都写入选择日志。
+        窄边不超过FRONTIER_MAX_WIDTH的子区域先运行轮廓动态规划，得到精确解后直接采用。
+        所有引擎都找不到可行路径时，返回stc/蛇形路径中最长的不经过障碍物的有效路径（尽力而为，可能未到达终点），
+        并在search_stats中记录 'feasible': False 和 'fallback'；没有这样的路径时返回空路径，'fallback'为None。
+        search_stats按引擎分别统计，最终保留采用的引擎的统计
+        """
+        if engines is None:
+            engines = tuple(ENGINE_REGISTRY)
+        features = subregion_features(self.grid, self.start, self.target)
+        _, predictions = select_engine(engines, features)
+        ordered = sorted(predictions, key=lambda e: predictions[e][0] / predictions[e][1])
+
+        # 窄条子区域先用轮廓动态规划求精确解；较宽的子区域不参与（状态数随宽度指数增长）
+        exact = 'frontier' in ordered and min(self.rows, self.cols) <= FRONTIER_MAX_WIDTH
+        ordered = [e for e in ordered if e != 'frontier']
+        if exact:
+            ordered.insert(0, 'frontier')
+
+        # 未设置展开节点数上限时临时设置，结束后恢复
+        saved_node_limit = self.node_limit
+        if self.node_limit is None:
+            self.node_limit = AUTO_NODE_LIMIT_FACTOR * max(1, int(self.available_grids))
+
+        best_path, best_engine, best_coverage = [], None, -1.0
+        fallback_path, fallback_engine = [], None
+        engine_stats = {}
+        try:
+            for engine in ordered:
+                expected_time, success_prob = predictions[engine]
+                print(f"代价模型选择引擎 {engine}（预计耗时 {expected_time:.3f}秒，成功概率 {success_prob:.2f}）")
+                # 每个引擎单独统计，前一个引擎的统计不混入后一个引擎的日志
+                self.search_stats = {}
+                begin = time.time()
+                try:
+                    path = self.run_engine(engine)
+                except (RecursionError, _SearchLimitReached) as e:
+                    print(f"引擎 {engine} 运行失败: {e!r}")
+                    path = []
+                elapsed = time.time() - begin
+                engine_stats[engine] = self.search_stats
+
+                success = self.is_successful_path(path)
+                coverage = self.calculate_coverage(path)
+                log_decision({
+                    'engine': engine,
+                    'features': features,
+                    'predicted_time': expected_time,
+                    'predicted_success': success_prob,
+                    'time': elapsed,
+                    'success': bool(success),
+                    'coverage': float(coverage),
+                    'search_stats': dict(self.search_stats),
+                })
+
+                if self.is_feasible_path(path) and coverage > best_coverage:
+                    best_path, best_engine, best_coverage = path, engine, coverage
+                if engine in FALLBACK_ENGINES and len(path) > len(fallback_path) and self.is_clear_path(path):
+                    fallback_path, fallback_engine = path, engine
+                if success:
+                    break
+                if engine == 'frontier' and len(path) and self.search_stats.get('frontier_exact'):
+                    # 精确的最长路径：其他引擎不可能更好，不必再试；无解时仍让其他引擎给出尽力而为的路径
+                    break
+                print(f"引擎 {engine} 未成功，尝试下一个引擎...")
+        finally:
+            self.node_limit = saved_node_limit
+
+        if best_engine is None:
+            if fallback_engine is None:
+                # 蛇形路径不避让障碍物，经过障碍物时不采用
+                path = self.meander_path()
+                if self.is_clear_path(path):
+                    fallback_path, fallback_engine = path, 'meander'
+            if fallback_engine is None:
+                print("警告：所有引擎都未找到可行路径，也没有不经过障碍物的尽力而为路径，返回空路径")
+            else:
+                print(f"警告：所有引擎都未找到可行路径，采用 {fallback_engine} 的尽力而为路径")
+            self.search_stats = dict(engine_stats.get(fallback_engine, {}))
+            self.search_stats.update({'feasible': False, 'fallback': fallback_engine})
+            best_path, best_engine = fallback_path, fallback_engine
+        else:
+            self.search_stats = engine_stats[best_engine]
+        self.search_stats['engine'] = best_engine
+        return as_path_array(best_path)
+
+    def is_feasible_path(self, path):
+        """检查路径是否有效、从起点到达终点、不经过障碍物且不超出长度上限"""
+        cells = as_path_array(path)
+        if len(cells) == 0 or tuple(cells[0]) != tuple(self.start) or tuple(cells[-1]) != tuple(self.target):
+            return False
+        if self.max_length is not None and len(cells) > self.max_length:
+            return False
+        return self.is_clear_path(cells)
+
+    def is_clear_path(self, path):
+        """检查路径是否有效且不经过障碍物（不要求从起点到达终点）"""
+        cells = as_path_array(path)
+        # 先检查有效性（含越界），再按索引检查是否经过障碍物
+        if not self.is_valid_path(cells):
+            return False
+        return not self.grid[cells[:, 0], cells[:, 1]].any()
+
+    def generate_longest_path(self, strategy='auto', extend=False):
+        """
+        根据障碍物情况或指定策略选择路径生成算法
+
+        参数:
+            strategy: 'auto'（按代价模型选择引擎）、'portfolio'（多引擎并发，取最先完成的完全覆盖路径），
+                      或已注册引擎的名称：'hamilton'、'hamilton_restart'（Luby调度的随机重启哈密顿路径）、
+                      'meander'、'stc'（生成树覆盖）、'bidirectional'（双向搜索）、'frontier'（窄条子区域的轮廓动态规划精确解）
+            extend: 是否在路径生成后用绕行插入扩展路径覆盖（见extend_path）
+
+        返回:
+            (N, 2) int32 路径数组，每行为子区域内的(行, 列)坐标
+        """
         total_start_time = time.time()
         print("开始生成障碍物感知最长路径...")
 
-        # 检查是否有障碍物
-        has_obstacles = len(np.where(self.grid == 1)[0]) > 0
-
-        # 选择最佳的路径生成策略
-        if has_obstacles:
-            print("检测到障碍物，尝试哈密顿路径...")
-            path = self.hamilton_path()
+        # 选择路径生成策略
+        if strategy == 'auto':
+            path = self.cost_model_path()
+        elif strategy == 'portfolio':
+            path = self.portfolio_path()
+        elif strategy in ENGINE_REGISTRY:
+            print(f"使用 {strategy} 引擎生成路径...")
+            path = self.run_engine(strategy)
         else:
-            print("无障碍物，使用蛇形路径生成...")
-            path = self.meander_path()
+            raise ValueError(f"未知的路径生成策略: {strategy}")
 
-        # 验证路径有效性
-        if not self.is_valid_path(path):
-            print("警告：生成的路径无效（可能存在交叉）！尝试蛇形路径...")
-            path = self.meander_path()
+        # 验证路径有效性；引擎没有给出路径时同样退回蛇形路径，避免子区域被静默丢弃
+        path = as_path_array(path)
+        if len(path) == 0 or not self.is_clear_path(path):
+            print("警告：生成的路径为空或无效（可能存在交叉或经过障碍物）！尝试蛇形路径...")
+            path, fallback = as_path_array(self.meander_path()), 'meander'
+            if not self.is_clear_path(path):
+                # 蛇形路径不避让障碍物，经过障碍物时返回空路径
+                print("警告：蛇形路径经过障碍物，不采用！")
+                path, fallback = as_path_array([]), None
+            self.search_stats.update({'feasible': False, 'fallback': fallback})
+
+        # 后处理：绕行插入扩展路径覆盖
+        if extend:
+            path = as_path_array(self.extend_path(path))
+
+        if (self.max_length is not None or self.min_coverage is not None) and not self.meets_targets(path):
+            print(f"警告：路径未满足长度上限({self.max_length})或覆盖率目标({self.min_coverage}%)！")
 
         self.path = path
         total_time = time.time() - total_start_time
@@ -271,22 +1373,21 @@ class ObstacleAwareLongestPath:
         return []  # 无法找到路径
 
     def is_valid_path(self, path):
-        """检查路径是否有效（无交叉）"""
-        # 检查每个点是否只出现一次
-        points_set = set()
-        for point in path:
-            if point in points_set:
-                return False
-            points_set.add(point)
+        """检查路径是否有效（无交叉），整条路径向量化检查"""
+        cells = as_path_array(path)
+        if len(cells) == 0:
+            return True
 
         # 检查相邻点是否真的相邻
-        for i in range(1, len(path)):
-            prev = path[i - 1]
-            curr = path[i]
-            if abs(prev[0] - curr[0]) + abs(prev[1] - curr[1]) != 1:
-                return False
+        if np.any(np.abs(np.diff(cells, axis=0)).sum(axis=1) != 1):
+            return False
 
-        return True
+        # 越界的点不是有效网格
+        if cells.min() < 0 or cells[:, 0].max() >= self.rows or cells[:, 1].max() >= self.cols:
+            return False
+
+        # 检查每个点是否只出现一次
+        return np.bincount(self.flat_indices(cells)).max() <= 1
 
 
 
@@ -0,0 +1,169 @@
+import numpy as np
+from scipy import ndimage
+from grid_io import load_grid
+from path_algorithm import as_path_array
+
+# 回归检查的指标及方向：1表示越大越好，-1表示越小越好
+METRIC_DIRECTIONS = {
+    'coverage': 1,
+    'min_subregion_coverage': 1,
+    'max_gap': -1,
+    'mean_gap': -1,
+    'total_turns': -1,
+    'length_cv': -1,
+}
+
+# 回归检查的默认容差：指标相对基线变差超过该比例时标记
+REGRESSION_TOLERANCE = 0.05
+
+
+def path_cells(path):
+    """把solve_path输出格式的路径（[x,y]列表）转换为(行, 列) int32数组"""
+    return as_path_array(path)[:, ::-1]
+
+
+def path_turns(cells):
+    """路径转弯次数：相邻两步方向不同的次数"""
+    if len(cells) < 3:
+        return 0
+    steps = np.diff(cells, axis=0)
+    return int(np.count_nonzero(np.any(steps[1:] != steps[:-1], axis=1)))
+
+
+def path_is_valid(cells, obstacles):
+    """路径是否有效：相邻点相邻、不越界、不经过障碍物、每个网格只经过一次"""
+    if len(cells) == 0:
+        return False
+    rows, cols = obstacles.shape
+    if np.any(np.abs(np.diff(cells, axis=0)).sum(axis=1) != 1):
+        return False
+    if cells.min() < 0 or cells[:, 0].max() >= rows or cells[:, 1].max() >= cols:
+        return False
+    if obstacles[cells[:, 0], cells[:, 1]].any():
+        return False
+    return np.bincount(cells[:, 0].astype(np.int64) * cols + cells[:, 1]).max() <= 1
+
+
+def layout_metrics(input_grid, paths):
+    """
+    计算一个布局的路径质量指标，全部基于数组运算和距离变换
+
+    参数:
+        input_grid: 二维数组或 .npy 文件路径，0表示可通行，1表示障碍物
+        paths: solve_path输出的路径列表，每个路径是一系列[x,y]坐标
+
+    返回:
+        指标字典：
+            lengths/turns: 各路径的长度（网格数）和转弯次数，及其总和 total_length/total_turns
+            valid: 所有路径是否都有效
+            coverage: 管道经过的可通行网格占全部可通行网格的百分比
+            subregion_coverage: 各路径的覆盖率——以每个可通行网格最近的管道划分服务范围，路径网格数占服务范围的百分比
+            max_gap/mean_gap: 可通行网格到最近管道的最大/平均欧氏距离（格），反映间距均匀程度
+            length_cv/length_ratio: 管道长度的变异系数和最长/最短之比，反映各区域长度均衡程度
+    """
+    obstacles = np.asarray(load_grid(input_grid)) != 0
+    valid = ~obstacles
+    rows, cols = obstacles.shape
+    valid_cells = int(valid.sum())
+
+    # 管道标号图：每格记录经过它的路径编号（从1开始），0表示没有管道
+    labels = np.zeros((rows, cols), dtype=np.int32)
+    lengths, turns, all_valid = [], [], True
+    for index, path in enumerate(paths, 1):
+        cells = path_cells(path)
+        lengths.append(len(cells))
+        turns.append(path_turns(cells))
+        all_valid = all_valid and path_is_valid(cells, obstacles)
+        inside = (cells[:, 0] >= 0) & (cells[:, 0] < rows) & (cells[:, 1] >= 0) & (cells[:, 1] < cols)
+        labels[cells[inside, 0], cells[inside, 1]] = index
+
+    count = len(paths)
+    pipe = (labels > 0) & valid
+    metrics = {
+        'paths': count,
+        'lengths': lengths,
+        'total_length': int(sum(lengths)),
+        'turns': turns,
+        'total_turns': int(sum(turns)),
+        'valid': bool(all_valid and count > 0),
+        'coverage': float(pipe.sum() / valid_cells * 100) if valid_cells else 0.0,
+    }
+
+    if pipe.any():
+        # 到最近管道网格的距离及该管道网格的坐标，据此得到每个可通行网格的服务管道
+        distance, (near_i, near_j) = ndimage.distance_transform_edt(~pipe, return_indices=True)
+        owner = labels[near_i, near_j]
+        served = np.bincount(owner[valid], minlength=count + 1)[1:]
+        covered = np.bincount(labels[pipe], minlength=count + 1)[1:]
+        subregion_coverage = np.divide(covered * 100.0, served, out=np.zeros(count), where=served > 0)
+        gaps = distance[valid]
+        metrics.update({
+            'subregion_coverage': subregion_coverage.tolist(),
+            'min_subregion_coverage': float(subregion_coverage.min()),
+            'max_gap': float(gaps.max()),
+            'mean_gap': float(gaps.mean()),
+        })
+    else:
+        metrics.update({
+            'subregion_coverage': [0.0] * count,
+            'min_subregion_coverage': 0.0,
+            'max_gap': float('inf'),
+            'mean_gap': float('inf'),
+        })
+
+    length_array = np.array(lengths, dtype=np.float64)
+    if count and length_array.mean() > 0:
+        metrics['length_cv'] = float(length_array.std() / length_array.mean())
+        metrics['length_ratio'] = float(length_array.max() / length_array.min()) if length_array.min() else float('inf')
+    else:
+        metrics['length_cv'] = 0.0
+        metrics['length_ratio'] = 1.0
+    return metrics
+
+
+def batch_metrics(layouts):
+    """
+    批量计算多个布局的指标
+
+    参数:
+        layouts: [(网格, 路径列表, 标签), ...]（与raster_renderer.write_contact_sheet相同）
+
+    返回:
+        指标字典列表，每项附带 'label'
+    """
+    return [dict(layout_metrics(grid, paths), label=label) for grid, paths, label in layouts]
+
+
+def rank_layouts(metrics, key='coverage'):
+    """按指标排序（按METRIC_DIRECTIONS的方向从好到差），用于挑出最好/最差的方案"""
+    direction = METRIC_DIRECTIONS.get(key, 1)
+    return sorted(metrics, key=lambda m: -direction * m[key])
+
+
+def flag_regressions(metrics, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    与基线指标（按label对应）比较，返回变差超过容差的项 [(label, 指标名, 基线值, 当前值), ...]；
+    路径由有效变为无效总是标记
+    """
+    baseline_by_label = {m['label']: m for m in baseline}
+    flagged = []
+    for current in metrics:
+        before = baseline_by_label.get(current['label'])
+        if before is None:
+            continue
+        if before['valid'] and not current['valid']:
+            flagged.append((current['label'], 'valid', True, False))
+        for name, direction in METRIC_DIRECTIONS.items():
+            old, new = before[name], current[name]
+            # 按方向统一为"越大越好"，变差超过 容差×|基线值| 时标记（基线为0时按绝对值比较）
+            if direction * (old - new) > tolerance * max(abs(old), 1e-9):
+                flagged.append((current['label'], name, old, new))
+    return flagged
+
+
+def print_metrics_table(metrics):
+    """打印指标对比表"""
+    print(f"{'方案':>12} {'有效':>4} {'覆盖率(%)':>9} {'最低子区域(%)':>12} {'最大间距':>8} {'转弯':>6} {'长度CV':>7}")
+    for m in metrics:
+        print(f"{str(m.get('label', '')):>12} {str(m['valid']):>4} {m['coverage']:>9.2f} "
+              f"{m['min_subregion_coverage']:>12.2f} {m['max_gap']:>8.2f} {m['total_turns']:>6} {m['length_cv']:>7.3f}")
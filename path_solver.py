@@ -7,25 +7,42 @@ import seaborn as sns
 import numpy as np
 import cv2
 import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from region_divider import RegionDivider
 from region_points_generator import PathEndpointGenerator
 from region_path_generator import RegionPathGenerator
+from region_bisector import RegionBisector
+from engine_selector import parity_feasible
+from path_algorithm import as_path_array
+from grid_io import TILE_ROWS, load_grid
+from shared_layout import SharedGrid, attach_grid
+
+# 连通分量：可通行网格数少于 MIN_COMPONENT_CELLS 的碎片无法布置管道，只报告不求解
+MIN_COMPONENT_CELLS = 8
 
 
 class LayoutFromGrid:
     """从输入网格创建布局管理器"""
 
     def __init__(self, grid):
-        self.grid = np.array(grid)
+        # 内存映射网格直接使用，不复制
+        self.grid = grid if isinstance(grid, np.memmap) else np.array(grid)
         self.rows, self.cols = self.grid.shape
 
+    def free_map(self):
+        """二值图像 (0表示障碍物，255表示可通行区域)；按行分块填充，不产生整张网格的中间数组"""
+        binary_map = np.empty((self.rows, self.cols), dtype=np.uint8)
+        for r0 in range(0, self.rows, TILE_ROWS):
+            binary_map[r0:r0 + TILE_ROWS] = (self.grid[r0:r0 + TILE_ROWS] == 0) * np.uint8(255)
+        return binary_map
+
     def get_boundary_points(self):
         """
         使用OpenCV的findContours函数提取有效区域的外边界点
         """
         # 创建二值图像 (0表示障碍物，255表示可通行区域)
-        binary_map = (1 - self.grid) * 255
-        binary_map = binary_map.astype(np.uint8)
+        binary_map = self.free_map()
 
         # 使用findContours函数提取轮廓
         contours, hierarchy = cv2.findContours(binary_map, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -61,61 +78,390 @@ def solve_path_json(json_input):
     input_data = json.loads(json_input)
     grid = input_data.get("grid", [])
     num_regions = input_data.get("num_regions", 10)
+    strategy = input_data.get("strategy", "auto")
+    extend = input_data.get("extend", False)
+    max_length = input_data.get("max_length")
+    min_coverage = input_data.get("min_coverage")
+    solve_timeout = input_data.get("solve_timeout")
+    partitioner = input_data.get("partitioner", "strips")
+    max_region_cells = input_data.get("max_region_cells")
+    orientation = input_data.get("orientation", "original")
+    divider_offsets = input_data.get("divider_offsets")
+    endpoint_candidates = input_data.get("endpoint_candidates", 1)
+
+    min_component_cells = input_data.get("min_component_cells", MIN_COMPONENT_CELLS)
 
     # Call the original solver
-    paths = solve_path(grid, num_regions)
+    layout = solve_layout(grid, num_regions, strategy, extend, max_length, min_coverage, solve_timeout,
+                          partitioner, max_region_cells, orientation, divider_offsets, endpoint_candidates,
+                          min_component_cells)
 
-    # Format and return JSON output
-    result = {"paths": paths}
+    # Format and return JSON output; fragments lists the free-cell islands too small to solve
+    result = {"paths": layout['paths'], "fragments": layout['fragments']}
     return json.dumps(result)
 
-def solve_path(input_grid, num_regions=10):
+def solve_path(input_grid, num_regions=10, strategy='auto', extend=False, max_length=None, min_coverage=None,
+               solve_timeout=None, partitioner='strips', max_region_cells=None, orientation='original',
+               divider_offsets=None, endpoint_candidates=1, min_component_cells=MIN_COMPONENT_CELLS):
     """
     输入图的求解器函数
 
     参数:
-        input_grid: 二维JSON数组 (列表的列表)，0表示可通行区域，1表示障碍物/边界
+        input_grid: 二维JSON数组 (列表的列表)，0表示可通行区域，1表示障碍物/边界；
+                    也可以是uint8/bool类型的 .npy 文件路径，以只读内存映射方式打开，适合超大布局
+        strategy: 子区域路径生成策略，'auto'、'hamilton'、'hamilton_restart'、'meander'、
+                  'stc'（生成树覆盖，适合大区域）或 'portfolio'（多策略并发）
+        extend: 是否在每条路径生成后用绕行插入把相邻未访问网格拉入路径
+        max_length: 每条管道的长度上限（网格数），搜索时剪去无法在上限内到达终点的分支
+        min_coverage: 每个子区域的覆盖率目标(%)，搜索得到满足目标的路径后立即停止
+        solve_timeout: 每个子区域求解的硬超时（秒），超时的子区域被终止并使用回退路径；None表示不限
+        partitioner: 区域划分方式，'strips'（竖向条带+水平分隔）或 'bisect'（递归二分，支持任意区域数）
+        max_region_cells: 'bisect' 划分时每个子区域的有效网格数上限，超出的区域继续二分
+        orientation: 'strips' 划分的布局方向，'original'、'transposed'（转置后划分）或 'auto'（两个方向都评估）
+        divider_offsets: 竖向分隔线整体平移的列数候选，如 [0, -1, 1]；与 orientation='auto' 一起并发评估，
+                         按可解子区域比例和面积均衡度选出最优划分，路径映射回原始坐标
+        endpoint_candidates: 每个子区域并行尝试的外边界候选端点组数，取首个完全覆盖的结果；1表示只用原始端点
+        min_component_cells: 可通行网格的连通分量少于该网格数时视为碎片，只报告不求解（见solve_layout）
 
     返回:
         JSON格式的路径数组：[路径1, 路径2, ...]
         每个路径是坐标点列表：[[x1,y1], [x2,y2], ...]
     """
-    # 将输入转换为numpy数组
-    grid = np.array(input_grid)
-    rows, cols = grid.shape
+    return solve_layout(input_grid, num_regions, strategy, extend, max_length, min_coverage, solve_timeout,
+                        partitioner, max_region_cells, orientation, divider_offsets, endpoint_candidates,
+                        min_component_cells)['paths']
+
+
+def solve_layout(input_grid, num_regions=10, strategy='auto', extend=False, max_length=None, min_coverage=None,
+                 solve_timeout=None, partitioner='strips', max_region_cells=None, orientation='original',
+                 divider_offsets=None, endpoint_candidates=1, min_component_cells=MIN_COMPONENT_CELLS):
+    """
+    按可通行网格的连通分量求解（参数同solve_path）
+
+    先用 cv2.connectedComponentsWithStats 标记4连通分量：只有一个分量时与原来一样整体划分求解；
+    有多个分量时每个分量裁剪到其外接矩形，按面积比例分配区域数（总数等于num_regions），各自划分、
+    求解（进程池并行，工作进程内的划分评估串行进行），路径平移回原始坐标。面积小于min_component_cells的碎片
+    视为障碍物，不参与划分和搜索；区域数少于分量数时，最小的分量分不到区域，同样只报告不求解。
+    竖向条带划分把每个条带分成上下两个子区域，此时按条带数 ceil(num_regions/2) 分配，各分量的区域数均为偶数，
+    管道总数与整体划分相同（num_regions为奇数时多一条）
+    内存映射的 .npy 网格不做分量标记（标记需要整张编号图），仍按块整体求解
+
+    返回:
+        {'paths': 与solve_path相同的路径列表,
+         'components': [{'label', 'area', 'bounds': (x, y, 宽, 高), 'num_regions'}, ...],
+         'fragments': [{'label', 'area', 'bounds'}, ...]}
+    """
+    grid = load_grid(input_grid)
+    solve_options = (strategy, extend, max_length, min_coverage, solve_timeout, partitioner, max_region_cells,
+                     orientation, divider_offsets, endpoint_candidates)
+
+    if isinstance(grid, np.memmap):
+        return {'paths': _solve_grid(grid, num_regions, solve_options), 'components': [], 'fragments': []}
+
+    labels, components, fragments = label_components(grid, min_component_cells)
+    for fragment in fragments:
+        print(f"警告：可通行区域碎片（{fragment['area']} 个网格，外接矩形 {fragment['bounds']}）过小，不求解")
+    if not components:
+        print("警告：布局中没有足够大的可通行区域，不求解")
+        return {'paths': [], 'components': [], 'fragments': fragments}
+
+    if len(components) == 1:
+        if fragments:
+            # 碎片视为障碍物（只改写各碎片外接矩形内的网格），避免落入分隔条带后被徒劳搜索
+            grid = np.array(grid, dtype=np.uint8)
+            for fragment in fragments:
+                x, y, w, h = fragment['bounds']
+                window = grid[y:y + h, x:x + w]
+                window[labels[y:y + h, x:x + w] == fragment['label']] = 1
+        components[0]['num_regions'] = num_regions
+        paths = _solve_grid(grid, num_regions, solve_options)
+        return {'paths': paths, 'components': components, 'fragments': fragments}
+
+    # 多个分量：按面积比例分配区域数（条带划分按条带数分配），各分量并行求解
+    areas = [component['area'] for component in components]
+    if partitioner == 'strips':
+        counts = [2 * strips for strips in allocate_regions(areas, int(np.ceil(num_regions / 2)))]
+    else:
+        counts = allocate_regions(areas, num_regions)
+    tasks, solved = [], []
+    for component, count in zip(components, counts):
+        component['num_regions'] = count
+        if count == 0:
+            print(f"警告：区域数少于连通分量数，分量（{component['area']} 个网格，外接矩形 {component['bounds']}）不求解")
+            continue
+        x, y, w, h = component['bounds']
+        crop = (labels[y:y + h, x:x + w] != component['label']).astype(np.uint8)
+        tasks.append((crop, count, solve_options))
+        solved.append(component)
+    print(f"布局包含 {len(components)} 个连通分量，区域数分配: {counts}")
+
+    with ProcessPoolExecutor(max_workers=min(len(tasks), multiprocessing.cpu_count())) as executor:
+        results = list(executor.map(_solve_component, tasks))
+
+    paths = []
+    for component, component_paths in zip(solved, results):
+        x, y, _, _ = component['bounds']
+        paths.extend([[px + x, py + y] for px, py in path] for path in component_paths)
+    return {'paths': paths, 'components': components, 'fragments': fragments}
+
+
+def label_components(grid, min_cells=MIN_COMPONENT_CELLS):
+    """
+    用 cv2.connectedComponentsWithStats 标记可通行网格的4连通分量
+
+    返回:
+        (labels, components, fragments)：labels为分量编号图（0为障碍物）；
+        components和fragments为 {'label', 'area', 'bounds': (x, y, 宽, 高)} 列表，
+        面积不少于min_cells的为components（按面积从大到小），其余为fragments
+    """
+    binary_map = LayoutFromGrid(grid).free_map()
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(binary_map, connectivity=4, ltype=cv2.CV_32S)
+
+    components, fragments = [], []
+    for label in range(1, count):
+        x, y, w, h, area = (int(v) for v in stats[label])
+        entry = {'label': label, 'area': area, 'bounds': (x, y, w, h)}
+        (components if area >= min_cells else fragments).append(entry)
+    components.sort(key=lambda c: -c['area'])
+    return labels, components, fragments
+
+
+def allocate_regions(areas, num_regions):
+    """
+    按面积比例把num_regions个区域分配给各连通分量（areas按从大到小排列），总数恰好为num_regions：
+    每个分量至少1个区域，超出的部分从分得最多（相对面积份额）的分量中扣回；
+    区域数少于分量数时只有最大的num_regions个分量各分到1个，其余为0
+    """
+    areas = np.asarray(areas, dtype=np.float64)
+    if num_regions <= len(areas):
+        return [1 if index < num_regions else 0 for index in range(len(areas))]
+
+    quotas = areas / areas.sum() * num_regions
+    counts = np.maximum(np.floor(quotas).astype(int), 1)
+    # 保底1个区域使总数超出时，从超出份额最多且多于1个区域的分量扣回
+    while counts.sum() > num_regions:
+        excess = np.where(counts > 1, counts - quotas, -np.inf)
+        counts[np.argmax(excess)] -= 1
+    # 余下的区域依次分给缺口最大的分量
+    while counts.sum() < num_regions:
+        counts[np.argmax(quotas - counts)] += 1
+    return counts.tolist()
+
+
+def _solve_grid(grid, num_regions, solve_options, parallel_division=True):
+    """对一张网格（整个布局或一个连通分量）划分并求解，返回[x,y]格式的路径列表"""
+    region_path_generator, vertical_dividers, horizontal_dividers, all_endpoints, transposed = prepare_solve(
+        grid, num_regions, *solve_options, parallel_division=parallel_division)
+
+    # 为所有子区域生成路径
+    paths = region_path_generator.generate_all_region_paths(
+        vertical_dividers, horizontal_dividers, all_endpoints)
+
+    return format_paths(paths, transposed)
+
+
+def _solve_component(task):
+    """连通分量的求解工作函数，task为 (分量网格, 区域数, 求解参数)"""
+    grid, num_regions, solve_options = task
+    # 已在进程池中运行，划分候选评估不再另开进程池
+    return _solve_grid(grid, num_regions, solve_options, parallel_division=False)
+
+
+def iter_solve_path(input_grid, num_regions=10, max_workers=1, **solve_options):
+    """
+    solve_path的流式版本：每完成一个子区域就产出其路径，便于界面和下游导出边求解边处理
+
+    参数:
+        max_workers: 1表示按区域顺序依次求解；大于1（或None表示CPU核数）时并行求解，按完成顺序产出
+        solve_options: 其余参数与solve_path相同
+
+    产出:
+        {'region', 'subregion', 'path': [[x1,y1], [x2,y2], ...], 'search_stats',
+         'solve_time'（该子区域求解秒数）, 'elapsed'（自开始求解起的秒数）}
+    """
+    region_path_generator, vertical_dividers, horizontal_dividers, all_endpoints, transposed = prepare_solve(
+        input_grid, num_regions, **solve_options)
+
+    for result in region_path_generator.iter_region_paths(
+            vertical_dividers, horizontal_dividers, all_endpoints, max_workers):
+        yield dict(result, path=format_path(result['path'], transposed))
+
+
+def prepare_solve(input_grid, num_regions=10, strategy='auto', extend=False, max_length=None, min_coverage=None,
+                  solve_timeout=None, partitioner='strips', max_region_cells=None, orientation='original',
+                  divider_offsets=None, endpoint_candidates=1, parallel_division=True):
+    """
+    完成区域划分和端点生成（参数同solve_path）；parallel_division为False时划分候选在当前进程中依次评估
+
+    返回:
+        (区域路径生成器, 竖向分隔线, 水平分隔线, 所有端点, 是否在转置后的网格上求解)
+    """
+    # 将输入转换为numpy数组（.npy 文件以内存映射方式打开）
+    grid = load_grid(input_grid)
+
+    if partitioner == 'bisect':
+        region_path_generator, all_endpoints = prepare_bisect(
+            LayoutFromGrid(grid), num_regions, max_region_cells, strategy, extend, max_length, min_coverage,
+            solve_timeout, endpoint_candidates)
+        return region_path_generator, [], [], all_endpoints, False
+    if partitioner != 'strips':
+        raise ValueError(f"未知的区域划分方式: {partitioner}")
+
+    # 选择布局方向和分隔线平移量
+    transposed, offset = orientation == 'transposed', 0
+    if orientation == 'auto' or divider_offsets:
+        best, _ = choose_division(grid, num_regions, orientation, divider_offsets or [0], parallel_division)
+        transposed, offset = best['transposed'], best['offset']
 
     # 创建布局管理器
-    layout_manager = LayoutFromGrid(grid)
+    layout_manager = LayoutFromGrid(np.ascontiguousarray(grid.T) if transposed else grid)
 
+    # 划分区域并生成所有区域的路径端点
+    divider, vertical_dividers, horizontal_dividers, endpoint_generator, all_endpoints = build_strip_division(
+        layout_manager, num_regions, offset)
+
+    # 创建区域路径生成器
+    region_path_generator = RegionPathGenerator(layout_manager, divider, endpoint_generator, strategy, extend,
+                                                max_length, min_coverage, solve_timeout, endpoint_candidates)
+
+    return region_path_generator, vertical_dividers, horizontal_dividers, all_endpoints, transposed
+
+
+def build_strip_division(layout_manager, num_regions, offset=0, divider=None, endpoint_generator=None):
+    """
+    竖向条带+水平分隔划分布局并生成端点，offset为竖向分隔线整体平移的列数；
+    可传入已创建的divider和endpoint_generator，在多次划分同一布局时复用其网格级预计算（有效网格、边界轮廓）
+    """
     # 创建区域划分器
-    divider = RegionDivider(layout_manager)
+    if divider is None:
+        divider = RegionDivider(layout_manager)
 
     # 生成分隔线
     vertical_dividers = divider.generate_vertical_dividers(num_regions=np.ceil(num_regions/2))
+    if offset:
+        vertical_dividers = sorted({min(max(x + offset, 1), layout_manager.cols - 1) for x in vertical_dividers})
     horizontal_dividers = divider.generate_horizontal_dividers(vertical_dividers)
 
     # 创建路径端点生成器
-    endpoint_generator = PathEndpointGenerator(layout_manager, divider)
+    if endpoint_generator is None:
+        endpoint_generator = PathEndpointGenerator(layout_manager, divider)
 
     # 生成所有区域的路径端点
     all_endpoints = endpoint_generator.generate_endpoints_for_all_regions(
         vertical_dividers, horizontal_dividers)
 
-    # 创建区域路径生成器
-    region_path_generator = RegionPathGenerator(layout_manager, divider, endpoint_generator)
+    return divider, vertical_dividers, horizontal_dividers, endpoint_generator, all_endpoints
+
+
+def score_division(layout_manager, num_regions, offset=0):
+    """
+    不做路径搜索的划分评分：统计可解子区域比例（可通行网格连通且起终点满足棋盘奇偶条件，
+    即可能存在完全覆盖路径）和面积均衡度（最大子区域面积 / 平均面积，越接近1越均衡）
+    """
+    divider, vertical_dividers, horizontal_dividers, endpoint_generator, all_endpoints = build_strip_division(
+        layout_manager, num_regions, offset)
+    generator = RegionPathGenerator(layout_manager, divider, endpoint_generator)
+
+    areas = []
+    solvable = 0
+    for endpoint in all_endpoints:
+        bounds = generator.subregion_bounds(endpoint, vertical_dividers, horizontal_dividers)
+        problem = generator.subregion_problem(*bounds, endpoint['start'], endpoint['end'])
+        if problem is None:
+            continue
+        rows, cols, obstacles, start, target = problem
+        subgrid = np.zeros((rows, cols), dtype=int)
+        if obstacles:
+            subgrid[tuple(np.array(obstacles).T)] = 1
+        free = (subgrid == 0).astype(np.uint8)
+        areas.append(int(free.sum()))
+
+        num_labels, _ = cv2.connectedComponents(free, connectivity=4)
+        if start != target and num_labels == 2 and parity_feasible(subgrid, start, target):
+            solvable += 1
+
+    return {
+        'subregions': len(all_endpoints),
+        'solvable': solvable / len(all_endpoints) if all_endpoints else 0.0,
+        'balance': float(max(areas) / np.mean(areas)) if areas else float('inf'),
+    }
 
-    # 为所有子区域生成路径
-    paths = region_path_generator.generate_all_region_paths(
-        vertical_dividers, horizontal_dividers, all_endpoints)
 
-    # 转换为所需的输出格式 - 注意坐标转换
-    result = []
-    for path_info in paths:
-        # 原代码中路径点格式为(y,x)，需要转换为[x,y]
-        path_points = [[x, y] for y, x in path_info['path']]
-        result.append(path_points)
+def _score_candidate(grid, num_regions, transposed, offset):
+    """评估一个候选划分（方向和平移量）"""
+    layout_manager = LayoutFromGrid(np.ascontiguousarray(grid.T) if transposed else grid)
+    score = score_division(layout_manager, num_regions, offset)
+    score.update(transposed=transposed, offset=offset)
+    return score
 
-    return result
+
+def _evaluate_division(candidate):
+    """候选划分的评估工作函数，candidate为 (共享网格句柄, num_regions, transposed, offset)"""
+    handle, num_regions, transposed, offset = candidate
+    return _score_candidate(attach_grid(handle), num_regions, transposed, offset)
+
+
+def choose_division(grid, num_regions, orientation='auto', divider_offsets=(0,), parallel=True):
+    """
+    并发评估布局方向与分隔线平移量的各种组合，选出可解子区域比例最高、其次面积最均衡的划分；
+    parallel为False时（如已在工作进程中）在当前进程中依次评估
+
+    返回:
+        (最优候选评分, 所有候选评分列表)，评分中包含 'transposed' 和 'offset'
+    """
+    orientations = {'original': [False], 'transposed': [True], 'auto': [False, True]}
+    if orientation not in orientations:
+        raise ValueError(f"未知的布局方向: {orientation}")
+
+    # 平移量按绝对值排序，评分相同时优先原始方向和不平移的划分
+    offsets = sorted(set(int(o) for o in divider_offsets), key=abs)
+    candidates = [(transposed, offset) for transposed in orientations[orientation] for offset in offsets]
+
+    if len(candidates) == 1 or not parallel:
+        scores = [_score_candidate(grid, num_regions, *candidate) for candidate in candidates]
+    else:
+        # 网格放入共享内存，工作进程按名称挂载，任务参数只有方向和平移量；
+        # 进程池正常关闭（而不是terminate），工作进程退出时关闭各自挂载的共享内存
+        with SharedGrid(grid) as shared:
+            pool = multiprocessing.Pool(min(len(candidates), multiprocessing.cpu_count()))
+            try:
+                scores = pool.map(_evaluate_division, [(shared.handle, num_regions, transposed, offset)
+                                                       for transposed, offset in candidates])
+            finally:
+                pool.close()
+                pool.join()
+
+    best = max(scores, key=lambda s: (s['solvable'], -s['balance']))
+    print(f"划分候选评估: {scores}")
+    print(f"选择划分: 转置={best['transposed']}, 平移={best['offset']}, "
+          f"可解比例={best['solvable']:.2f}, 均衡度={best['balance']:.2f}")
+    return best, scores
+
+
+def prepare_bisect(layout_manager, num_regions, max_region_cells, strategy, extend, max_length, min_coverage,
+                   solve_timeout, endpoint_candidates=1):
+    """递归二分划分：叶子区域的边界和端点都由划分树得到，返回 (区域路径生成器, 所有端点)"""
+    bisector = RegionBisector(layout_manager)
+    leaves = bisector.bisect(num_regions=num_regions, max_cells=max_region_cells)
+    all_endpoints = bisector.generate_endpoints(leaves)
+
+    region_path_generator = RegionPathGenerator(layout_manager, bisector, None, strategy, extend,
+                                                max_length, min_coverage, solve_timeout, endpoint_candidates)
+    return region_path_generator, all_endpoints
+
+
+def format_paths(paths, transposed=False):
+    """转换为所需的输出格式 - 注意坐标转换；transposed表示路径是在转置后的网格上求得的"""
+    return [format_path(path_info['path'], transposed) for path_info in paths]
+
+
+def format_path(path, transposed=False):
+    """把一条(y,x)格式的路径数组转换为[x,y]坐标列表（在输出边界处才转换为列表）"""
+    # 原代码中路径点格式为(y,x)，需要转换为[x,y]；转置网格上的(y,x)即原网格的(x,y)
+    path = as_path_array(path)
+    if transposed:
+        return path.tolist()
+    return path[:, ::-1].tolist()
 
 
 def visualize_grid_and_paths(input_grid, paths, title="路径规划结果可视化"):
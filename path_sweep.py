@@ -0,0 +1,155 @@
+import time
+import numpy as np
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from path_algorithm import ObstacleAwareLongestPath, as_path_array, PATH_DTYPE
+from grid_io import ValidGridView, load_grid
+from path_solver import LayoutFromGrid, build_strip_division, format_paths
+from region_divider import RegionDivider
+from region_points_generator import PathEndpointGenerator
+from region_path_generator import RegionPathGenerator, extract_subregion_problem
+from shared_layout import SharedGrid, attach_grid
+
+
+def _solve_problem(handle, bounds, start_point, end_point, options):
+    """
+    参数扫描的子区域求解工作函数：按句柄挂载共享网格，只根据子区域边界和端点提取问题，
+    返回 (路径, 搜索统计, 耗时)
+    """
+    begin = time.time()
+    valid_grid = ValidGridView(attach_grid(handle))
+    rows, cols, obstacles, start, target = extract_subregion_problem(valid_grid, *bounds, start_point, end_point)
+    solver = ObstacleAwareLongestPath(rows, cols, obstacles, start, target,
+                                      max_length=options['max_length'], min_coverage=options['min_coverage'])
+    path = solver.generate_longest_path(options['strategy'], options['extend'])
+    return as_path_array(path), solver.search_stats, time.time() - begin
+
+
+def sweep_solve(input_grid, region_counts, orientations=('original',), strategy='auto', extend=False,
+                max_length=None, min_coverage=None, max_workers=None):
+    """
+    对多个区域数（及布局方向）做参数扫描，比较各方案的求解结果
+
+    同一方向的轮廓提取、RegionDivider和端点生成器只创建一次；各方案中完全相同的子区域问题
+    （大小、障碍物和起终点都相同）只求解一次，所有不同的子区域在进程池中并行求解；
+    每个方向的网格放入共享内存，工作进程按名称挂载，任务只携带子区域边界和端点
+
+    参数:
+        input_grid: 二维数组，0表示可通行区域，1表示障碍物/边界
+        region_counts: 要比较的区域数列表，如 [6, 8, 10]
+        orientations: 要比较的布局方向，'original' 和/或 'transposed'
+        max_workers: 进程池大小，None表示使用CPU核数
+
+    返回:
+        对比表（列表），每个方案一行：区域数、方向、子区域数、求解耗时、各路径长度、总覆盖率、
+        最长管道长度、复用之前方案结果的子区域数，以及与solve_path格式相同的路径 'paths'；
+        耗时为划分耗时加上该方案中新求解的子区域的求解耗时
+    """
+    grid = load_grid(input_grid)
+    options = {'strategy': strategy, 'extend': extend, 'max_length': max_length, 'min_coverage': min_coverage}
+    start_time = time.time()
+
+    # 划分各方案，收集子区域问题
+    candidates = []
+    unique_problems = {}
+    first_seen = {}
+    # 每个方向的网格放入共享内存；离开with块（包括出错）时释放
+    with ExitStack() as shared_grids:
+        tasks = {}
+        for orientation in orientations:
+            if orientation not in ('original', 'transposed'):
+                raise ValueError(f"未知的布局方向: {orientation}")
+            transposed = orientation == 'transposed'
+
+            # 网格级预计算：每个方向只做一次
+            layout_manager = LayoutFromGrid(np.ascontiguousarray(grid.T) if transposed else grid)
+            shared = shared_grids.enter_context(SharedGrid(layout_manager.grid))
+            divider = RegionDivider(layout_manager)
+            endpoint_generator = PathEndpointGenerator(layout_manager, divider)
+            generator = RegionPathGenerator(layout_manager, divider, endpoint_generator)
+
+            for num_regions in region_counts:
+                division_start = time.time()
+                _, vertical_dividers, horizontal_dividers, _, all_endpoints = build_strip_division(
+                    layout_manager, num_regions, divider=divider, endpoint_generator=endpoint_generator)
+
+                subregions = []
+                for endpoint in all_endpoints:
+                    x_min, x_max, y_min, y_max = generator.subregion_bounds(
+                        endpoint, vertical_dividers, horizontal_dividers)
+                    problem = generator.subregion_problem(x_min, x_max, y_min, y_max,
+                                                          endpoint['start'], endpoint['end'])
+                    if problem is None:
+                        continue
+                    rows, cols, obstacles, start, target = problem
+                    key = (rows, cols, tuple(obstacles), start, target)
+                    # 记录首次出现该子区域问题的方案序号，用于统计复用
+                    first_seen.setdefault(key, len(candidates))
+                    unique_problems.setdefault(key, None)
+                    tasks.setdefault(key, (shared.handle, (x_min, x_max, y_min, y_max),
+                                           endpoint['start'], endpoint['end']))
+                    subregions.append((endpoint['region'], endpoint['subregion'], key, (y_min, x_min)))
+
+                candidates.append({
+                    'num_regions': num_regions,
+                    'orientation': orientation,
+                    'transposed': transposed,
+                    'valid_cells': int(np.sum(divider.valid_grid)),
+                    'division_time': time.time() - division_start,
+                    'subregions': subregions,
+                })
+
+        total_subregions = sum(len(c['subregions']) for c in candidates)
+        print(f"参数扫描：{len(candidates)} 个方案，共 {total_subregions} 个子区域，"
+              f"其中不同的子区域 {len(unique_problems)} 个")
+
+        # 并行求解所有不同的子区域问题
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(_solve_problem, *tasks[key], options): key for key in unique_problems}
+            for future in as_completed(futures):
+                unique_problems[futures[future]] = future.result()
+
+    # 汇总每个方案的结果
+    table = []
+    for index, candidate in enumerate(candidates):
+        paths = []
+        solve_time = candidate['division_time']
+        reused = 0
+        for region, subregion, key, (y_min, x_min) in candidate['subregions']:
+            path, search_stats, elapsed = unique_problems[key]
+            if first_seen[key] < index:
+                # 与之前的方案相同的子区域，直接复用结果
+                reused += 1
+            else:
+                solve_time += elapsed
+            if len(path):
+                global_path = path + np.array([int(y_min), int(x_min)], dtype=PATH_DTYPE)
+                paths.append({'region': region, 'subregion': subregion, 'path': global_path,
+                              'search_stats': search_stats})
+
+        lengths = [len(p['path']) for p in paths]
+        covered = len(np.unique(np.concatenate([p['path'] for p in paths]), axis=0)) if paths else 0
+        table.append({
+            'num_regions': candidate['num_regions'],
+            'orientation': candidate['orientation'],
+            'subregions': len(candidate['subregions']),
+            'time': solve_time,
+            'path_lengths': lengths,
+            'coverage': covered / candidate['valid_cells'] * 100 if candidate['valid_cells'] else 0.0,
+            'max_pipe_length': max(lengths) if lengths else 0,
+            'reused_subregions': reused,
+            'paths': format_paths(paths, candidate['transposed']),
+        })
+
+    print(f"参数扫描完成，总耗时: {time.time() - start_time:.2f}秒，"
+          f"复用的子区域求解: {total_subregions - len(unique_problems)} 次")
+    print_sweep_table(table)
+    return table
+
+
+def print_sweep_table(table):
+    """打印参数扫描对比表"""
+    print(f"{'区域数':>6} {'方向':>10} {'子区域':>6} {'耗时(秒)':>9} {'覆盖率(%)':>9} {'最长管道':>8}  路径长度")
+    for row in table:
+        print(f"{row['num_regions']:>6} {row['orientation']:>10} {row['subregions']:>6} {row['time']:>9.2f} "
+              f"{row['coverage']:>9.2f} {row['max_pipe_length']:>8}  {row['path_lengths']}")
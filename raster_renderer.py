@@ -0,0 +1,120 @@
+import numpy as np
+import cv2
+from grid_io import load_grid
+
+# 颜色均为BGR，与visualize_grid_and_paths的配色一致：白色为可通行区域，灰色为障碍物
+FREE_COLOR = (255, 255, 255)
+OBSTACLE_COLOR = (128, 128, 128)
+GRID_LINE_COLOR = (211, 211, 211)
+PATH_COLORS = [(255, 0, 0), (0, 128, 0), (0, 0, 255), (128, 0, 128), (0, 165, 255), (42, 42, 165)]
+START_COLOR = (0, 160, 0)
+END_COLOR = (0, 0, 255)
+
+# 未指定cell_size时，每格默认像素数及图像最长边上限
+DEFAULT_CELL_SIZE = 12
+MAX_IMAGE_SIZE = 2048
+
+
+def render_layout(input_grid, paths, cell_size=None, max_size=MAX_IMAGE_SIZE, grid_lines=True, title=None):
+    """
+    不依赖图形界面，把网格和路径栅格化为BGR图像（numpy uint8数组）
+
+    参数:
+        input_grid: 二维数组或 .npy 文件路径，0表示可通行，1表示障碍物
+        paths: 路径列表，每个路径是一系列[x,y]坐标（solve_path的输出格式）
+        cell_size: 每格像素数；None表示自动选择，使图像最长边不超过max_size（超大网格时每格可小于1像素）
+        grid_lines: 每格像素足够大时是否画网格线
+        title: 图像左上角的标题文字（cv2字体只支持ASCII）
+    """
+    grid = load_grid(input_grid)
+    rows, cols = grid.shape
+    scale = cell_size if cell_size is not None else min(DEFAULT_CELL_SIZE, max_size / max(rows, cols))
+    height, width = max(1, int(round(rows * scale))), max(1, int(round(cols * scale)))
+
+    # 底图：每格一个像素的索引图，一次缩放到目标尺寸后查表上色
+    base = (np.asarray(grid) != 0).astype(np.uint8)
+    interpolation = cv2.INTER_NEAREST if scale >= 1 else cv2.INTER_AREA
+    base = cv2.resize(base * 255, (width, height), interpolation=interpolation) > 127
+    palette = np.array([FREE_COLOR, OBSTACLE_COLOR], dtype=np.uint8)
+    image = palette[base.astype(np.uint8)]
+
+    if grid_lines and scale >= 6:
+        # 网格线位置与格子一样按 round(索引 × scale) 取整，非整数缩放时不会随索引累积偏移
+        row_edges = np.round(np.arange(rows + 1) * scale).astype(int)
+        col_edges = np.round(np.arange(cols + 1) * scale).astype(int)
+        image[np.minimum(row_edges, height - 1), :] = GRID_LINE_COLOR
+        image[:, np.minimum(col_edges, width - 1)] = GRID_LINE_COLOR
+
+    # 路径：格中心的像素坐标，每条路径一次polylines
+    thickness = max(1, int(scale / 4))
+    marker = max(2, int(scale / 2.5))
+    for i, path in enumerate(paths):
+        if len(path) == 0:
+            continue
+        points = np.round((np.asarray(path, dtype=np.float64) + 0.5) * scale).astype(np.int32)
+        cv2.polylines(image, [points.reshape(-1, 1, 2)], False, PATH_COLORS[i % len(PATH_COLORS)],
+                      thickness, cv2.LINE_AA)
+        cv2.circle(image, tuple(map(int, points[0])), marker, START_COLOR, -1, cv2.LINE_AA)
+        cv2.circle(image, tuple(map(int, points[-1])), marker, END_COLOR, -1, cv2.LINE_AA)
+
+    if title:
+        cv2.putText(image, str(title), (4, 16), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1, cv2.LINE_AA)
+    return image
+
+
+def save_png(filename, image):
+    """把图像写为PNG文件"""
+    if not cv2.imwrite(str(filename), image):
+        raise IOError(f"无法写入图像文件: {filename}")
+    return filename
+
+
+def render_png(input_grid, paths, filename, **kwargs):
+    """渲染网格和路径并直接写为PNG文件（参数同render_layout）"""
+    return save_png(filename, render_layout(input_grid, paths, **kwargs))
+
+
+def contact_sheet(images, labels=None, columns=None, tile_size=256, label_height=20, gap=6,
+                  background=(255, 255, 255)):
+    """
+    把多张渲染结果按网格排成一张总览图（批量检查用），每张缩放到tile_size见方内并保持长宽比，下方标注label
+    """
+    count = len(images)
+    if count == 0:
+        raise ValueError("没有可拼接的图像")
+    columns = columns or int(np.ceil(np.sqrt(count)))
+    sheet_rows = int(np.ceil(count / columns))
+    cell_h, cell_w = tile_size + label_height + gap, tile_size + gap
+
+    sheet = np.empty((sheet_rows * cell_h, columns * cell_w, 3), dtype=np.uint8)
+    sheet[:] = background
+    for index, image in enumerate(images):
+        r, c = divmod(index, columns)
+        h, w = image.shape[:2]
+        ratio = tile_size / max(h, w)
+        th, tw = max(1, int(h * ratio)), max(1, int(w * ratio))
+        interpolation = cv2.INTER_AREA if ratio < 1 else cv2.INTER_NEAREST
+        thumb = cv2.resize(image, (tw, th), interpolation=interpolation)
+
+        y0, x0 = r * cell_h + gap // 2, c * cell_w + gap // 2
+        oy, ox = (tile_size - th) // 2, (tile_size - tw) // 2
+        sheet[y0 + oy:y0 + oy + th, x0 + ox:x0 + ox + tw] = thumb
+        if labels is not None:
+            cv2.putText(sheet, str(labels[index])[:40], (x0 + 4, y0 + tile_size + label_height - 6),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 0, 0), 1, cv2.LINE_AA)
+    return sheet
+
+
+def write_contact_sheet(layouts, filename, columns=None, tile_size=256, **render_kwargs):
+    """
+    批量渲染多个布局并写为一张PNG总览图
+
+    参数:
+        layouts: [(网格, 路径列表, 标签), ...]
+        render_kwargs: 传给render_layout的参数（如cell_size、grid_lines）
+    """
+    images, labels = [], []
+    for grid, paths, label in layouts:
+        images.append(render_layout(grid, paths, **render_kwargs))
+        labels.append(label)
+    return save_png(filename, contact_sheet(images, labels, columns, tile_size))
@@ -0,0 +1,154 @@
+import numpy as np
+from grid_io import TILE_ROWS, valid_grid_of
+from region_points_generator import outer_boundary_mask
+
+
+class RegionBisector:
+    def __init__(self, layout_manager):
+        """初始化递归二分(k-d)区域划分器，接收LayoutManager作为参数"""
+        self.layout_manager = layout_manager
+        self.valid_grid = valid_grid_of(self.layout_manager.grid)
+        self.grid_area = np.sum(self.valid_grid)
+
+        # 二维前缀和：prefix[y, x] 为 valid_grid[:y, :x] 的有效网格数，任意矩形面积O(1)查询；按行分块累加
+        rows, cols = self.valid_grid.shape
+        self.prefix = np.zeros((rows + 1, cols + 1), dtype=np.int64)
+        for r0 in range(0, rows, TILE_ROWS):
+            tile = self.valid_grid[r0:r0 + TILE_ROWS]
+            self.prefix[r0 + 1:r0 + 1 + len(tile), 1:] = (np.cumsum(np.cumsum(tile, axis=0), axis=1)
+                                                          + self.prefix[r0, 1:])
+
+        self.outer_boundary = outer_boundary_mask(self.valid_grid)
+
+    def area(self, x_min, x_max, y_min, y_max):
+        """矩形[x_min, x_max) × [y_min, y_max)内的有效网格数"""
+        p = self.prefix
+        return int(p[y_max, x_max] - p[y_min, x_max] - p[y_max, x_min] + p[y_min, x_min])
+
+    def bisect(self, num_regions=None, max_cells=None):
+        """
+        递归二分划分布局，沿交替的坐标轴按有效面积比例切分
+
+        参数:
+            num_regions: 目标区域数（任意正整数），None表示只按max_cells划分
+            max_cells: 每个子区域的有效网格数上限，超出的区域继续二分
+
+        返回:
+            按划分树叶子顺序排列的矩形列表 [(x_min, x_max, y_min, y_max), ...]
+        """
+        rows, cols = self.valid_grid.shape
+        if num_regions is None and max_cells is None:
+            raise ValueError("num_regions和max_cells至少需要指定一个")
+
+        # 第一次沿较长的边切分，之后交替
+        first_axis = 'x' if cols >= rows else 'y'
+        leaves = []
+        self._split((0, cols, 0, rows), int(num_regions or 1), max_cells, first_axis, leaves)
+        print(f"递归二分划分完成，共 {len(leaves)} 个子区域，"
+              f"最大子区域面积: {max(self.area(*leaf) for leaf in leaves) if leaves else 0}")
+        return leaves
+
+    def _split(self, rect, parts, max_cells, axis, leaves):
+        """将矩形划分为parts个部分（面积超出max_cells时增加部分数），叶子按顺序加入leaves"""
+        x_min, x_max, y_min, y_max = rect
+        area = self.area(*rect)
+        if area == 0:
+            return
+
+        if parts <= 1 and max_cells is not None and area > max_cells:
+            parts = int(np.ceil(area / max_cells))
+        if parts <= 1:
+            leaves.append(rect)
+            return
+
+        # 该方向无法再切分时换另一个方向
+        if (axis == 'x' and x_max - x_min < 2) or (axis == 'y' and y_max - y_min < 2):
+            axis = 'y' if axis == 'x' else 'x'
+            if (axis == 'x' and x_max - x_min < 2) or (axis == 'y' and y_max - y_min < 2):
+                leaves.append(rect)
+                return
+
+        # 按部分数比例切分，使两侧有效面积之比接近 left_parts : right_parts
+        left_parts = parts // 2
+        position = self._split_position(rect, axis, area * left_parts / parts)
+        next_axis = 'y' if axis == 'x' else 'x'
+        if axis == 'x':
+            first, second = (x_min, position, y_min, y_max), (position, x_max, y_min, y_max)
+        else:
+            first, second = (x_min, x_max, y_min, position), (x_min, x_max, position, y_max)
+
+        self._split(first, left_parts, max_cells, next_axis, leaves)
+        self._split(second, parts - left_parts, max_cells, next_axis, leaves)
+
+    def _split_position(self, rect, axis, target_area):
+        """用前缀和求切分位置，使切分线一侧的有效面积最接近target_area（不取矩形边缘）"""
+        x_min, x_max, y_min, y_max = rect
+        p = self.prefix
+        if axis == 'x':
+            positions = np.arange(x_min + 1, x_max)
+            cumulative = (p[y_max, positions] - p[y_min, positions]) - (p[y_max, x_min] - p[y_min, x_min])
+        else:
+            positions = np.arange(y_min + 1, y_max)
+            cumulative = (p[positions, x_max] - p[positions, x_min]) - (p[y_min, x_max] - p[y_min, x_min])
+        return int(positions[np.argmin(np.abs(cumulative - target_area))])
+
+    def generate_endpoints(self, leaves, max_candidates=400):
+        """
+        为每个叶子区域生成路径端点：在位于外边界上的有效网格中，优先选择满足奇偶条件
+        （可能存在完全覆盖路径）的一对，其次选择曼哈顿距离最远的一对
+
+        返回与PathEndpointGenerator相同格式的端点列表，另外带有子区域边界'bounds'
+        """
+        all_endpoints = []
+        for region_num, (x_min, x_max, y_min, y_max) in enumerate(leaves, start=1):
+            valid = self.valid_grid[y_min:y_max, x_min:x_max] == 1
+            boundary = self.outer_boundary[y_min:y_max, x_min:x_max]
+            candidates = np.argwhere(boundary)
+            on_boundary = len(candidates) > 0
+            if not on_boundary:
+                # 区域不接触外边界时，退而使用区域矩形边缘上的有效网格
+                print(f"警告: 区域 {region_num} 不接触外边界，端点取在区域边缘上")
+                edge = np.zeros_like(valid)
+                edge[0, :] = edge[-1, :] = edge[:, 0] = edge[:, -1] = True
+                candidates = np.argwhere(valid & edge)
+                if len(candidates) == 0:
+                    candidates = np.argwhere(valid)
+
+            # 候选过多时均匀抽样，控制两两比较的规模
+            if len(candidates) > max_candidates:
+                candidates = candidates[np.linspace(0, len(candidates) - 1, max_candidates).astype(int)]
+
+            start, end = self._pick_endpoint_pair(candidates, valid, x_min, y_min)
+            all_endpoints.append({
+                'region': region_num,
+                'subregion': 'whole',
+                # 端点坐标为(x, y)，与PathEndpointGenerator一致
+                'start': (int(start[1] + x_min), int(start[0] + y_min)),
+                'end': (int(end[1] + x_min), int(end[0] + y_min)),
+                'bounds': (x_min, x_max, y_min, y_max),
+                'on_boundary': on_boundary,
+            })
+        return all_endpoints
+
+    def _pick_endpoint_pair(self, candidates, valid, x_min, y_min):
+        """在候选网格中选出端点对：满足奇偶条件的优先，其次曼哈顿距离最远"""
+        if len(candidates) == 1:
+            return candidates[0], candidates[0]
+
+        # 按全局棋盘着色统计区域内两种颜色的有效网格数
+        rows, cols = valid.shape
+        colors = (np.add.outer(np.arange(rows) + y_min, np.arange(cols) + x_min) % 2)
+        counts = [int(np.sum(valid & (colors == c))) for c in (0, 1)]
+        cand_colors = (candidates[:, 0] + y_min + candidates[:, 1] + x_min) % 2
+
+        # 同色端点要求该颜色比另一种多一个，异色端点要求两种颜色数量相等
+        same = cand_colors[:, None] == cand_colors[None, :]
+        parity_ok = np.where(same,
+                             np.array([counts[0] - counts[1] == 1, counts[1] - counts[0] == 1])[cand_colors][:, None],
+                             counts[0] == counts[1])
+
+        distance = np.abs(candidates[:, None, :] - candidates[None, :, :]).sum(axis=2)
+        score = distance + parity_ok * (rows + cols)
+        np.fill_diagonal(score, -1)
+        a, b = np.unravel_index(np.argmax(score), score.shape)
+        return candidates[a], candidates[b]
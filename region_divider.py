@@ -1,11 +1,12 @@
 import numpy as np
+from grid_io import valid_grid_of
 
 
 class RegionDivider:
     def __init__(self, layout_manager):
         """初始化区域划分器，接收LayoutManager作为参数"""
         self.layout_manager = layout_manager
-        self.valid_grid = 1 - self.layout_manager.grid
+        self.valid_grid = valid_grid_of(self.layout_manager.grid)  # 内存映射网格时为按需反转的视图
         self.boundary_polygon = None
         self.obstacle_polygons = []
         self.grid_area = np.sum(self.valid_grid)
@@ -92,7 +93,7 @@ class RegionDivider:
         cumulative_area = 0
 
         # 计算每列的面积
-        column_areas = [np.sum(self.valid_grid[:, x]) for x in range(max_x)]
+        column_areas = self.valid_grid.sum(axis=0)
 
         # 从左向右扫描，按面积累计划分
         for x in range(1, max_x):
@@ -123,7 +124,7 @@ class RegionDivider:
             region_valid_grid = self.valid_grid[:, x_min:x_max]
 
             # 计算该区域内每行的有效网格数量
-            row_valid_counts = [np.sum(region_valid_grid[row, :]) for row in range(self.layout_manager.rows)]
+            row_valid_counts = region_valid_grid.sum(axis=1, dtype=np.int64)
 
             # 计算该区域总的有效网格数量
             total_valid_count = np.sum(row_valid_counts)
@@ -1,122 +1,380 @@
+import os
+import signal
 import time
-from path_algorithm import ObstacleAwareLongestPath
+import multiprocessing
+import multiprocessing.connection
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from path_algorithm import ObstacleAwareLongestPath, as_path_array, PATH_DTYPE
+
+# 并行尝试候选端点时，每组端点的求解时间预算（秒）
+CANDIDATE_TIMEOUT = 5.0
+
+# 并行流式求解时，进程池工作进程中的区域路径生成器（由进程池初始化函数设置）
+_STREAM_GENERATOR = None
+
+
+def _init_stream_worker(generator):
+    """进程池工作进程初始化：保存区域路径生成器，之后的子区域任务只需传递边界和端点"""
+    global _STREAM_GENERATOR
+    _STREAM_GENERATOR = generator
+
+
+def _stream_task(region, subregion, bounds, start_point, end_point):
+    """在进程池工作进程中求解一个子区域，返回 (全局坐标路径, 搜索统计, 耗时)"""
+    begin = time.time()
+    path = _STREAM_GENERATOR.generate_region_path(region, subregion, *bounds, start_point, end_point)
+    return path, _STREAM_GENERATOR.search_stats.get((region, subregion), {}), time.time() - begin
+
+
+def reap_process(worker):
+    """终止（若仍在运行）并回收工作进程及其进程组（工作进程须已调用os.setpgrp成为进程组组长）"""
+    if worker.is_alive():
+        if hasattr(os, 'killpg'):
+            try:
+                os.killpg(worker.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                worker.kill()
+        else:
+            worker.kill()
+    worker.join()
+
+
+def _solve_subregion_worker(rows, cols, obstacles, start, target, options, conn):
+    """受监管的子区域求解工作进程：求解后通过管道把(路径, 搜索统计)发回主进程"""
+    # 独立进程组，超时时主进程可以连同其派生的子进程（如组合求解的工作进程）一起终止
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    solver = ObstacleAwareLongestPath(rows, cols, obstacles, start, target,
+                                      max_length=options['max_length'], min_coverage=options['min_coverage'])
+    path = solver.generate_longest_path(options['strategy'], options['extend'])
+    conn.send((as_path_array(path), solver.search_stats))
+    conn.close()
+
+
+def extract_subregion_problem(valid_grid, x_min, x_max, y_min, y_max, start_point, end_point):
+    """
+    从有效网格中提取子区域的求解问题：返回 (rows, cols, 障碍物列表, 起点, 终点)，均为子区域相对坐标；
+    子区域大小无效时返回None
+    """
+    # 获取子区域的大小
+    rows = int(y_max - y_min)
+    cols = int(x_max - x_min)
+
+    if rows <= 0 or cols <= 0:
+        return None
+
+    # 确定子区域内的障碍物（只取子区域切片，内存映射网格不会整张读入），转换为相对于子区域的坐标
+    sub_valid = valid_grid[int(y_min):int(y_max), int(x_min):int(x_max)]
+    obstacles = [tuple(cell) for cell in np.argwhere(sub_valid == 0).tolist()]  # 0表示不可通行区域
+
+    # 转换起点和终点到子区域相对坐标
+    start_rel = (int(start_point[1] - y_min), int(start_point[0] - x_min))
+    end_rel = (int(end_point[1] - y_min), int(end_point[0] - x_min))
+
+    # 确保起点和终点在子区域内且不是障碍物
+    if start_rel[0] < 0 or start_rel[0] >= rows or start_rel[1] < 0 or start_rel[1] >= cols:
+        # 调整起点到子区域边界
+        start_rel = (max(0, min(rows - 1, start_rel[0])), max(0, min(cols - 1, start_rel[1])))
+
+    if end_rel[0] < 0 or end_rel[0] >= rows or end_rel[1] < 0 or end_rel[1] >= cols:
+        # 调整终点到子区域边界
+        end_rel = (max(0, min(rows - 1, end_rel[0])), max(0, min(cols - 1, end_rel[1])))
+
+    # 确保起点和终点不在障碍物上
+    if start_rel in obstacles:
+        obstacles.remove(start_rel)
+
+    if end_rel in obstacles:
+        obstacles.remove(end_rel)
+
+    return rows, cols, obstacles, start_rel, end_rel
 
 
 class RegionPathGenerator:
-    def __init__(self, layout_manager, region_divider, endpoint_generator):
-        """初始化区域路径生成器"""
+    def __init__(self, layout_manager, region_divider, endpoint_generator, strategy='auto', extend=False,
+                 max_length=None, min_coverage=None, solve_timeout=None, endpoint_candidates=1,
+                 candidate_timeout=CANDIDATE_TIMEOUT):
+        """
+        初始化区域路径生成器
+
+        strategy和extend为子区域路径生成策略及是否扩展路径覆盖（见ObstacleAwareLongestPath.generate_longest_path），
+        max_length和min_coverage为每条管道的长度上限和覆盖率目标(%)，
+        solve_timeout为每个子区域求解的硬超时（秒）：设置后每个子区域在受监管的子进程中求解，超时即终止并使用回退路径，
+        endpoint_candidates大于1时每个子区域并行尝试多组外边界候选端点（每组限时candidate_timeout秒），取首个完全覆盖的结果
+        """
         self.layout_manager = layout_manager
         self.region_divider = region_divider
         self.endpoint_generator = endpoint_generator
         self.valid_grid = region_divider.valid_grid  # 使用region_divider中的valid_grid标记可通行区域
         self.paths = []  # 存储所有子区域的路径
         self.time_tracking = {}  # 性能监控
+        self.strategy = strategy
+        self.extend = extend
+        self.max_length = max_length
+        self.min_coverage = min_coverage
+        self.solve_timeout = solve_timeout
+        self.endpoint_candidates = endpoint_candidates
+        self.candidate_timeout = candidate_timeout
+        self.search_stats = {}  # 每个子区域的搜索统计，键为(region, subregion)
 
-    def generate_all_region_paths(self, vertical_dividers, horizontal_dividers, all_endpoints):
+    def generate_all_region_paths(self, vertical_dividers, horizontal_dividers, all_endpoints, max_workers=1):
         """为所有子区域生成路径"""
+        for _ in self.iter_region_paths(vertical_dividers, horizontal_dividers, all_endpoints, max_workers):
+            pass
+        return self.paths
+
+    def iter_region_paths(self, vertical_dividers, horizontal_dividers, all_endpoints, max_workers=1):
+        """
+        逐个生成子区域路径，每完成一个子区域就产出其结果
+
+        max_workers为1时按端点顺序依次求解；大于1（或None表示CPU核数）时在进程池中并行求解，按完成顺序产出
+
+        产出:
+            {'region', 'subregion', 'path'（全局(行, 列)坐标的 (N, 2) int32 数组）, 'search_stats', 'solve_time'（该子区域求解秒数）,
+             'elapsed'（自开始求解起的秒数）}；生成失败的子区域不产出
+        """
         print("开始为所有子区域生成路径...")
         start_time = time.time()
 
-        all_vertical_dividers = [0] + vertical_dividers + [self.layout_manager.cols]
-
-        # 为每个子区域生成路径
+        # 确定每个子区域的边界
+        jobs = []
         for endpoint in all_endpoints:
-            region = endpoint['region']
-            subregion = endpoint['subregion']
-            start_point = endpoint['start']
-            end_point = endpoint['end']
-
-            print(f"处理区域 {region} 的 {subregion} 子区域...")
-
-            # 确定子区域的边界
-            x_min = all_vertical_dividers[region - 1]
-            x_max = all_vertical_dividers[region]
-
-            # 找到可能的水平分隔线
-            y_divider = None
-            for x_start, x_end, y_pos in horizontal_dividers:
-                if x_start == x_min and x_end == x_max:
-                    y_divider = y_pos
-                    break
+            bounds = self.subregion_bounds(endpoint, vertical_dividers, horizontal_dividers)
+            jobs.append((endpoint['region'], endpoint['subregion'], bounds, endpoint['start'], endpoint['end']))
 
-            # 确定子区域的边界行
-            if subregion == 'upper' and y_divider is not None:
-                y_min = y_divider
-                y_max = self.layout_manager.rows
-            elif subregion == 'lower' and y_divider is not None:
-                y_min = 0
-                y_max = y_divider
-            else:  # whole region
-                y_min = 0
-                y_max = self.layout_manager.rows
-
-            # 生成子区域的路径
-            path = self.generate_region_path(region, subregion, x_min, x_max, y_min, y_max, start_point, end_point)
-
-            if path:
-                self.paths.append({
-                    'region': region,
-                    'subregion': subregion,
-                    'path': path
-                })
-                print(f"区域 {region} 的 {subregion} 子区域路径生成完成，长度为 {len(path)}")
-            else:
-                print(f"警告: 区域 {region} 的 {subregion} 子区域路径生成失败！")
+        if max_workers == 1:
+            # 为每个子区域生成路径
+            for region, subregion, bounds, start_point, end_point in jobs:
+                print(f"处理区域 {region} 的 {subregion} 子区域...")
+                begin = time.time()
+                path = self.generate_region_path(region, subregion, *bounds, start_point, end_point)
+                result = self._record_path(region, subregion, path, time.time() - begin)
+                if result:
+                    yield dict(result, elapsed=time.time() - start_time)
+        else:
+            # 工作进程通过初始化函数继承本生成器（fork启动时不序列化网格），任务只携带子区域边界和端点，
+            # 各自独立求解子区域（超时监管、候选端点照常生效）
+            executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_stream_worker,
+                                           initargs=(self,))
+            try:
+                futures = {executor.submit(_stream_task, *job): job for job in jobs}
+                for future in as_completed(futures):
+                    region, subregion = futures[future][:2]
+                    path, search_stats, solve_time = future.result()
+                    self.search_stats[(region, subregion)] = search_stats
+                    result = self._record_path(region, subregion, path, solve_time)
+                    if result:
+                        yield dict(result, elapsed=time.time() - start_time)
+            finally:
+                # 使用方提前停止迭代时，取消尚未开始的子区域任务
+                executor.shutdown(wait=True, cancel_futures=True)
 
         self.time_tracking["所有区域路径生成"] = time.time() - start_time
         print(f"所有子区域路径生成完成，总耗时: {self.time_tracking['所有区域路径生成']:.2f}秒")
-        return self.paths
+
+    def subregion_bounds(self, endpoint, vertical_dividers, horizontal_dividers):
+        """确定端点所属子区域的边界 (x_min, x_max, y_min, y_max)"""
+        # 端点自带子区域边界时（递归二分划分）直接使用
+        if 'bounds' in endpoint:
+            return endpoint['bounds']
+
+        all_vertical_dividers = [0] + vertical_dividers + [self.layout_manager.cols]
+        region = endpoint['region']
+        subregion = endpoint['subregion']
+        x_min = all_vertical_dividers[region - 1]
+        x_max = all_vertical_dividers[region]
+
+        # 找到可能的水平分隔线
+        y_divider = None
+        for x_start, x_end, y_pos in horizontal_dividers:
+            if x_start == x_min and x_end == x_max:
+                y_divider = y_pos
+                break
+
+        # 确定子区域的边界行
+        if subregion == 'upper' and y_divider is not None:
+            y_min = y_divider
+            y_max = self.layout_manager.rows
+        elif subregion == 'lower' and y_divider is not None:
+            y_min = 0
+            y_max = y_divider
+        else:  # whole region
+            y_min = 0
+            y_max = self.layout_manager.rows
+
+        return x_min, x_max, y_min, y_max
+
+    def _record_path(self, region, subregion, path, solve_time):
+        """记录子区域的路径生成结果，成功时返回记录的路径信息"""
+        if path is not None and len(path):
+            self.paths.append({
+                'region': region,
+                'subregion': subregion,
+                'path': path,
+                'search_stats': self.search_stats.get((region, subregion), {}),
+                'solve_time': solve_time
+            })
+            print(f"区域 {region} 的 {subregion} 子区域路径生成完成，长度为 {len(path)}")
+            return self.paths[-1]
+        print(f"警告: 区域 {region} 的 {subregion} 子区域路径生成失败！")
+        return None
+
+    def subregion_problem(self, x_min, x_max, y_min, y_max, start_point, end_point):
+        """提取子区域的求解问题（见extract_subregion_problem）"""
+        return extract_subregion_problem(self.valid_grid, x_min, x_max, y_min, y_max, start_point, end_point)
 
     def generate_region_path(self, region, subregion, x_min, x_max, y_min, y_max, start_point, end_point):
         """为指定子区域生成路径"""
-        # 获取子区域的大小
-        rows = int(y_max - y_min)
-        cols = int(x_max - x_min)
-
-        if rows <= 0 or cols <= 0:
-            print(f"警告: 区域 {region} 的 {subregion} 子区域大小无效: rows={rows}, cols={cols}")
+        problem = self.subregion_problem(x_min, x_max, y_min, y_max, start_point, end_point)
+        if problem is None:
+            print(f"警告: 区域 {region} 的 {subregion} 子区域大小无效: "
+                  f"rows={int(y_max - y_min)}, cols={int(x_max - x_min)}")
             return None
+        rows, cols, obstacles, start_rel, end_rel = problem
 
-        # 确定子区域内的障碍物
-        obstacles = []
-        for i in range(int(y_min), int(y_max)):
-            for j in range(int(x_min), int(x_max)):
-                if i < self.layout_manager.rows and j < self.layout_manager.cols:
-                    if self.valid_grid[i, j] == 0:  # 0表示不可通行区域
-                        # 转换为相对于子区域的坐标
-                        obstacles.append((i - int(y_min), j - int(x_min)))
+        # 生成路径
+        result = None
+        use_candidates = self.endpoint_candidates > 1 and hasattr(self.endpoint_generator, 'candidate_endpoint_pairs')
+        if use_candidates:
+            result = self.solve_endpoint_candidates(x_min, x_max, y_min, y_max, start_point, end_point)
+        if result is not None:
+            path, search_stats = result
+        elif use_candidates:
+            # 候选端点都未在预算内完成：原始端点的求解同样限时（未设置solve_timeout时用candidate_timeout）
+            timeout = self.solve_timeout if self.solve_timeout is not None else self.candidate_timeout
+            path, search_stats = self.solve_supervised(rows, cols, obstacles, start_rel, end_rel, timeout)
+        elif self.solve_timeout is None:
+            path_generator = ObstacleAwareLongestPath(rows, cols, obstacles, start_rel, end_rel,
+                                                      max_length=self.max_length, min_coverage=self.min_coverage)
+            path = path_generator.generate_longest_path(self.strategy, self.extend)
+            search_stats = path_generator.search_stats
+        else:
+            path, search_stats = self.solve_supervised(rows, cols, obstacles, start_rel, end_rel)
+        self.search_stats[(region, subregion)] = search_stats
 
-        # 转换起点和终点到子区域相对坐标
-        start_rel = (int(start_point[1] - y_min), int(start_point[0] - x_min))
-        end_rel = (int(end_point[1] - y_min), int(end_point[0] - x_min))
+        # 转换回全局坐标：整条路径数组一次平移
+        return as_path_array(path) + np.array([int(y_min), int(x_min)], dtype=PATH_DTYPE)
 
-        # 确保起点和终点在子区域内且不是障碍物
-        if start_rel[0] < 0 or start_rel[0] >= rows or start_rel[1] < 0 or start_rel[1] >= cols:
-            # 调整起点到子区域边界
-            start_rel = (max(0, min(rows - 1, start_rel[0])), max(0, min(cols - 1, start_rel[1])))
+    def solve_supervised(self, rows, cols, obstacles, start, target, timeout=None):
+        """
+        在受监管的子进程中求解子区域：超过timeout（默认solve_timeout）秒仍未完成时终止并回收工作进程，
+        改用线性时间的生成树覆盖路径（不可行时用蛇形路径）作为回退，并在搜索统计中记录超时
+        """
+        if timeout is None:
+            timeout = self.solve_timeout
+        options = self._solve_options()
+        recv_conn, send_conn = multiprocessing.Pipe(duplex=False)
+        worker = multiprocessing.Process(
+            target=_solve_subregion_worker,
+            args=(rows, cols, obstacles, start, target, options, send_conn))
+        start_time = time.time()
+        worker.start()
+        send_conn.close()
 
-        if end_rel[0] < 0 or end_rel[0] >= rows or end_rel[1] < 0 or end_rel[1] >= cols:
-            # 调整终点到子区域边界
-            end_rel = (max(0, min(rows - 1, end_rel[0])), max(0, min(cols - 1, end_rel[1])))
+        result = None
+        try:
+            if recv_conn.poll(timeout):
+                result = recv_conn.recv()
+        except EOFError:
+            # 工作进程异常退出，没有发回结果
+            pass
+        finally:
+            recv_conn.close()
+            if result is not None:
+                # 已收到结果，给工作进程一点时间正常退出
+                worker.join(1)
+            self._reap_worker(worker)
 
-        # 确保起点和终点不在障碍物上
-        if start_rel in obstacles:
-            obstacles.remove(start_rel)
+        elapsed = time.time() - start_time
+        if result is not None:
+            path, search_stats = result
+            search_stats.update({'timed_out': False, 'solve_time': elapsed})
+            return path, search_stats
 
-        if end_rel in obstacles:
-            obstacles.remove(end_rel)
+        print(f"警告：子区域求解超过 {timeout} 秒或工作进程异常退出，使用回退路径！")
+        fallback = ObstacleAwareLongestPath(rows, cols, obstacles, start, target,
+                                            max_length=self.max_length, min_coverage=self.min_coverage)
+        path = fallback.spanning_tree_path()
+        fallback_engine = 'stc'
+        if not fallback.is_feasible_path(path):
+            path = fallback.meander_path()
+            fallback_engine = 'meander'
+        return as_path_array(path), {'timed_out': True, 'solve_time': elapsed, 'fallback': fallback_engine}
 
-        # 创建路径生成器对象
-        path_generator = ObstacleAwareLongestPath(rows, cols, obstacles, start_rel, end_rel)
+    def solve_endpoint_candidates(self, x_min, x_max, y_min, y_max, start_point, end_point):
+        """
+        为子区域并行尝试多组候选端点，每组在独立子进程中求解且限时candidate_timeout秒；
+        得到完全覆盖（或满足覆盖率目标）的路径后立即终止其余进程
 
+        返回:
+            (子区域相对坐标路径, 搜索统计)；所有候选都未在预算内给出可行路径时返回None
+        """
+        pairs = self.endpoint_generator.candidate_endpoint_pairs(
+            x_min, x_max, y_min, y_max, start_point, end_point, self.endpoint_candidates)
+        options = self._solve_options()
+        target_coverage = self.min_coverage if self.min_coverage is not None else 100.0
 
-        # 生成路径
-        path = path_generator.generate_longest_path()
+        pending = {}
+        for index, (start, end) in enumerate(pairs):
+            problem = self.subregion_problem(x_min, x_max, y_min, y_max, start, end)
+            recv_conn, send_conn = multiprocessing.Pipe(duplex=False)
+            worker = multiprocessing.Process(target=_solve_subregion_worker, args=(*problem, options, send_conn))
+            worker.start()
+            send_conn.close()
+            pending[recv_conn] = (index, worker, problem)
+
+        start_time = time.time()
+        deadline = start_time + self.candidate_timeout
+        best = None  # (覆盖率, 候选序号, 路径, 搜索统计)
+        workers = [worker for _, worker, _ in pending.values()]
+        try:
+            while pending and (best is None or best[0] < target_coverage):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                for conn in multiprocessing.connection.wait(list(pending), timeout=remaining):
+                    index, _, problem = pending.pop(conn)
+                    try:
+                        path, search_stats = conn.recv()
+                    except EOFError:
+                        # 工作进程异常退出，没有发回结果
+                        continue
+                    finally:
+                        conn.close()
+                    rows, cols, obstacles, start, target = problem
+                    checker = ObstacleAwareLongestPath(rows, cols, obstacles, start, target,
+                                                       max_length=self.max_length)
+                    if not checker.is_feasible_path(path):
+                        continue
+                    coverage = checker.calculate_coverage(path)
+                    if best is None or coverage > best[0]:
+                        best = (coverage, index, path, search_stats)
+        finally:
+            for conn in pending:
+                conn.close()
+            for worker in workers:
+                self._reap_worker(worker)
+
+        if best is None:
+            print(f"警告：{len(pairs)} 组候选端点均未在 {self.candidate_timeout} 秒内得到可行路径，改用原始端点限时求解")
+            return None
 
-        # 转换回全局坐标
-        global_path = []
-        for i, j in path:
-            global_path.append((i + int(y_min), j + int(x_min)))
+        coverage, index, path, search_stats = best
+        search_stats.update({'endpoint_candidate': index, 'endpoint_candidates': len(pairs),
+                             'candidate_coverage': coverage, 'solve_time': time.time() - start_time})
+        print(f"候选端点 {index + 1}/{len(pairs)} 胜出，覆盖率 {coverage:.2f}%")
+        return path, search_stats
 
-        return global_path
+    def _solve_options(self):
+        """传给子进程求解工作函数的求解参数"""
+        return {
+            'strategy': self.strategy,
+            'extend': self.extend,
+            'max_length': self.max_length,
+            'min_coverage': self.min_coverage,
+        }
 
+    def _reap_worker(self, worker):
+        """终止（若仍在运行）并回收工作进程及其进程组"""
+        reap_process(worker)
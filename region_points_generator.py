@@ -1,4 +1,33 @@
+import numpy as np
+import cv2
 from shapely.geometry import LineString, Point
+from engine_selector import DEFAULT_COST_MODEL, subregion_features, select_engine
+
+
+def outer_boundary_mask(valid_grid):
+    """标记与外部区域相邻的有效网格（管道起终点需位于外边界上）"""
+    valid_grid = np.asarray(valid_grid)
+    rows, cols = valid_grid.shape
+
+    # 外部区域：与网格外侧连通的无效网格
+    invalid = np.ones((rows + 2, cols + 2), dtype=np.uint8)
+    invalid[1:-1, 1:-1] = (valid_grid == 0)
+    _, labels = cv2.connectedComponents(invalid, connectivity=4)
+    exterior = labels == labels[0, 0]
+
+    # 有效网格的四邻域中存在外部网格即为外边界网格
+    near_exterior = (exterior[:-2, 1:-1] | exterior[2:, 1:-1] |
+                     exterior[1:-1, :-2] | exterior[1:-1, 2:])
+    return (valid_grid == 1) & near_exterior
+
+
+def column_fallback_row(valid_column, position):
+    """一列有效网格（1表示可通行）中的回退端点行号，规则见PathEndpointGenerator.fallback_row"""
+    free_rows = np.flatnonzero(valid_column)
+    if len(free_rows) == 0:
+        return float(len(valid_column) - 1) if position == 'top' else 0.0
+    index = {'top': -1, 'bottom': 0, 'middle': len(free_rows) // 2}[position]
+    return float(free_rows[index])
 
 
 class PathEndpointGenerator:
@@ -7,12 +36,21 @@ class PathEndpointGenerator:
         self.layout_manager = layout_manager
         self.region_divider = region_divider
         self.boundary_line = self.create_boundary_line()
+        self.outer_boundary = None  # 外边界网格标记，生成候选端点时才在整个网格上计算一次
 
     def create_boundary_line(self):
         """创建边界线的LineString对象"""
         boundary_points = self.layout_manager.get_boundary_points()
         return LineString(boundary_points)
 
+    def fallback_row(self, column, position):
+        """
+        分隔线与边界没有可用交点时的回退端点行号：取端点所在列中真实的有效网格，
+        position为 'top'（行号最大）、'bottom'（行号最小）或 'middle'；该列没有有效网格时取网格内的边界行
+        """
+        column = min(max(int(column), 0), self.layout_manager.cols - 1)
+        return column_fallback_row(self.region_divider.valid_grid[:, column], position)
+
     def find_intersection_points(self, divider_x, y_min=0, y_max=None):
         """寻找垂直分隔线与边界的交点"""
         if y_max is None:
@@ -143,7 +181,7 @@ class PathEndpointGenerator:
                             upper_start = lower_start = left_intersections[0]
                         else:
                             # 最后手段 - 使用推断坐标
-                            upper_start = lower_start = (x_min, 7.0)  # 估计值
+                            upper_start = lower_start = (x_min, self.fallback_row(x_min, 'middle'))
 
                     # 上部区域终点：右侧分隔线上方的交点
                     upper_right = [p for p in right_intersections if p[1] >= y_pos]
@@ -151,16 +189,17 @@ class PathEndpointGenerator:
                         upper_end = max(upper_right, key=lambda p: p[1])
                     else:
                         # 右侧没有上方交点，使用右分隔线与顶部的交点
-                        upper_end = (x_max, max([p[1] for p in right_intersections]) if right_intersections else 15.6)
+                        upper_end = (x_max, max([p[1] for p in right_intersections]) if right_intersections
+                                     else self.fallback_row(x_max - 1, 'top'))
 
                     # 下部区域终点：右侧分隔线下方的交点
                     lower_right = [p for p in right_intersections if p[1] <= y_pos]
                     if lower_right:
                         lower_end = min(lower_right, key=lambda p: p[1])
                     else:
-                        lower_end = (x_max, 0.0)  # 默认到底部边界
+                        lower_end = (x_max, self.fallback_row(x_max - 1, 'bottom'))  # 默认到底部边界
 
-                elif region_num == 5:  # 区域5的特殊处理: 右侧为特殊边界
+                elif region_num == len(all_vertical_dividers) - 1:  # 最右侧区域的特殊处理: 右侧为特殊边界
                     # 查找水平分隔线与边界的交点
                     if horizontal_boundary_intersections:
                         # 如果水平线与边界有交点，用它作为上下区域共享的终点
@@ -172,21 +211,21 @@ class PathEndpointGenerator:
                             upper_end = lower_start = right_intersections[0]
                         else:
                             # 最后手段 - 使用推断坐标
-                            upper_end = lower_start = (x_max, 11.0)  # 估计值
+                            upper_end = lower_start = (x_max, self.fallback_row(x_max - 1, 'middle'))
 
                     # 上部区域起点：左侧分隔线上方的交点
                     upper_left = [p for p in left_intersections if p[1] >= y_pos]
                     if upper_left:
                         upper_start = max(upper_left, key=lambda p: p[1])
                     else:
-                        upper_start = (x_min, 24.0)  # 默认到顶部边界
+                        upper_start = (x_min, self.fallback_row(x_min, 'top'))  # 默认到顶部边界
 
                     # 下部区域终点：左侧分隔线下方的交点
                     lower_left = [p for p in left_intersections if p[1] <= y_pos]
                     if lower_left:
                         lower_end = min(lower_left, key=lambda p: p[1])
                     else:
-                        lower_end = (x_min, 0.0)  # 默认到底部边界
+                        lower_end = (x_min, self.fallback_row(x_min, 'bottom'))  # 默认到底部边界
 
                 else:  # 一般区域的处理
                     # 上半部分：左侧上方点到右侧上方点
@@ -246,8 +285,8 @@ class PathEndpointGenerator:
                     })
                 else:
                     # 处理边缘情况
-                    start_point = (x_min, self.layout_manager.rows / 2)
-                    end_point = (x_max, self.layout_manager.rows / 2)
+                    start_point = (x_min, self.fallback_row(x_min, 'middle'))
+                    end_point = (x_max, self.fallback_row(x_max - 1, 'middle'))
 
                     all_endpoints.append({
                         'region': region_num,
@@ -258,3 +297,62 @@ class PathEndpointGenerator:
 
         return all_endpoints
 
+    def candidate_endpoint_pairs(self, x_min, x_max, y_min, y_max, start_point, end_point, count=4,
+                                 max_cells=60):
+        """
+        列出子区域的候选端点对（全局(x, y)坐标），第一对为原始端点，其余取自子区域内与外边界相邻的网格
+
+        候选按棋盘奇偶可行性（可能存在完全覆盖路径）优先、其次按代价模型预测的求解难度排序；
+        外边界在整个网格上计算（裁剪后孔洞可能被切开而误判为外部），各子区域取其切片
+        """
+        if self.outer_boundary is None:
+            self.outer_boundary = outer_boundary_mask(self.region_divider.valid_grid)
+
+        x_min, x_max, y_min, y_max = int(x_min), int(x_max), int(y_min), int(y_max)
+        pairs = [(start_point, end_point)]
+        cells = np.argwhere(self.outer_boundary[y_min:y_max, x_min:x_max])
+        if count <= 1 or len(cells) < 2:
+            return pairs
+
+        # 外边界网格过多时均匀抽样
+        if len(cells) > max_cells:
+            cells = cells[np.linspace(0, len(cells) - 1, max_cells).astype(int)]
+
+        subgrid = 1 - self.region_divider.valid_grid[y_min:y_max, x_min:x_max]
+        colors = np.add.outer(np.arange(y_max - y_min), np.arange(x_max - x_min)) % 2
+        counts = [int(np.sum((subgrid == 0) & (colors == c))) for c in (0, 1)]
+        cell_colors = (cells[:, 0] + cells[:, 1]) % 2
+
+        # 同色端点要求该颜色比另一种多一个，异色端点要求两种颜色数量相等
+        surplus = np.array([counts[0] - counts[1] == 1, counts[1] - counts[0] == 1])
+        same = cell_colors[:, None] == cell_colors[None, :]
+        parity_ok = np.where(same, surplus[cell_colors][:, None], counts[0] == counts[1])
+        distance = np.abs(cells[:, None, :] - cells[None, :, :]).sum(axis=2)
+
+        # 初选：奇偶可行且距离远的端点对，每个网格最多用一次以保证候选之间有差异
+        a_idx, b_idx = np.triu_indices(len(cells), k=1)
+        order = np.lexsort((-distance[a_idx, b_idx], ~parity_ok[a_idx, b_idx]))
+        used = set()
+        shortlist = []
+        for k in order:
+            a, b = int(a_idx[k]), int(b_idx[k])
+            if a in used or b in used:
+                continue
+            used.update((a, b))
+            shortlist.append((bool(parity_ok[a, b]), tuple(cells[a]), tuple(cells[b])))
+            if len(shortlist) >= 3 * count:
+                break
+
+        # 按预测难度（最优引擎的期望代价 = 预测耗时 / 成功概率）排序
+        ranked = []
+        for feasible, start, target in shortlist:
+            features = subregion_features(subgrid, start, target)
+            _, predictions = select_engine(list(DEFAULT_COST_MODEL), features)
+            cost = min(t / p for t, p in predictions.values())
+            ranked.append((not feasible, cost, start, target))
+        ranked.sort(key=lambda r: (r[0], r[1]))
+
+        for _, _, start, target in ranked[:count - 1]:
+            # 子区域相对(行, 列)转换为全局(x, y)
+            pairs.append(((start[1] + x_min, start[0] + y_min), (target[1] + x_min, target[0] + y_min)))
+        return pairs
@@ -0,0 +1,91 @@
+import time
+import numpy as np
+import cv2
+from raster_renderer import OBSTACLE_COLOR, save_png
+
+# 深度采样缓冲区大小：写满后隔一个丢弃一个，采样间隔加倍，内存固定
+TRACE_MAX_SAMPLES = 4096
+# 默认每隔多少次展开采样一次搜索深度
+TRACE_SAMPLE_EVERY = 256
+# 热力图每格像素数
+HEATMAP_CELL_SIZE = 16
+
+
+class SearchTrace:
+    """
+    DFS搜索轨迹记录器：按网格统计展开次数和回溯次数（预分配数组），并按展开次数间隔采样搜索深度和耗时，
+    用于定位哈密顿路径搜索在子区域的哪些位置反复回溯
+
+    通过 ObstacleAwareLongestPath.enable_trace() 挂到求解器上；未启用时搜索中只多一次 is None 判断
+    """
+
+    def __init__(self, rows, cols, obstacles=(), sample_every=TRACE_SAMPLE_EVERY, max_samples=TRACE_MAX_SAMPLES):
+        self.rows = rows
+        self.cols = cols
+        self.expansions = np.zeros((rows, cols), dtype=np.int64)
+        self.backtracks = np.zeros((rows, cols), dtype=np.int64)
+        self.obstacles = np.zeros((rows, cols), dtype=bool)
+        for i, j in obstacles:
+            self.obstacles[i, j] = True
+
+        # 深度采样：每行为 (累计展开次数, 搜索深度, 距开始的秒数)
+        self.sample_every = sample_every
+        self.samples = np.zeros((max_samples, 3), dtype=np.float64)
+        self.sample_count = 0
+        self.total_expansions = 0
+        self.start_time = time.perf_counter()
+
+    def expand(self, i, j, depth):
+        """记录一次展开"""
+        self.expansions[i, j] += 1
+        self.total_expansions += 1
+        if self.total_expansions % self.sample_every == 0:
+            self._sample(depth)
+
+    def backtrack(self, i, j):
+        """记录一次回溯"""
+        self.backtracks[i, j] += 1
+
+    def _sample(self, depth):
+        if self.sample_count == len(self.samples):
+            # 缓冲区写满：保留偶数位置的采样，采样间隔加倍
+            kept = self.samples[::2].copy()
+            self.samples[:len(kept)] = kept
+            self.sample_count = len(kept)
+            self.sample_every *= 2
+        self.samples[self.sample_count] = (self.total_expansions, depth, time.perf_counter() - self.start_time)
+        self.sample_count += 1
+
+    @property
+    def depth_samples(self):
+        """已记录的深度采样 (K, 3)：累计展开次数、搜索深度、秒数"""
+        return self.samples[:self.sample_count]
+
+    def save_npz(self, filename):
+        """把轨迹数据写为 .npz 文件（expansions、backtracks、obstacles、depth_samples）"""
+        np.savez_compressed(filename, expansions=self.expansions, backtracks=self.backtracks,
+                            obstacles=self.obstacles, depth_samples=self.depth_samples)
+        return filename
+
+    def heatmap(self, kind='backtracks', cell_size=HEATMAP_CELL_SIZE):
+        """
+        按子区域网格对齐的热力图（BGR图像），每格cell_size像素；计数取对数后映射到颜色，
+        障碍物为灰色。kind为 'backtracks' 或 'expansions'
+        """
+        counts = getattr(self, kind)
+        scaled = np.log1p(counts.astype(np.float64))
+        if scaled.max() > 0:
+            scaled = scaled / scaled.max()
+        image = cv2.applyColorMap((scaled * 255).astype(np.uint8), cv2.COLORMAP_INFERNO)
+        image[self.obstacles] = OBSTACLE_COLOR
+        return cv2.resize(image, (self.cols * cell_size, self.rows * cell_size), interpolation=cv2.INTER_NEAREST)
+
+    def save_heatmap(self, filename, kind='backtracks', cell_size=HEATMAP_CELL_SIZE):
+        """把热力图写为PNG文件"""
+        return save_png(filename, self.heatmap(kind, cell_size))
+
+
+def load_trace(filename):
+    """读取 save_npz 写出的轨迹数据，返回字典"""
+    with np.load(filename) as data:
+        return {name: data[name] for name in data.files}
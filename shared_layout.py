@@ -0,0 +1,83 @@
+import os
+import numpy as np
+from multiprocessing import shared_memory, util
+from grid_io import TILE_ROWS
+
+# 工作进程中已挂载的共享内存块，按名称缓存，同一进程内多次任务只挂载一次
+_ATTACHED = {}
+# 已注册进程退出清理函数的进程号（fork出的子进程需重新注册）
+_FINALIZER_PID = None
+
+
+class SharedGrid:
+    """
+    把障碍物网格（1表示障碍物）以uint8放入 multiprocessing.shared_memory 共享内存块，
+    工作进程通过 handle（名称和形状）挂载同一块内存，任务参数中不再携带网格
+
+    作为上下文管理器使用：离开 with 块（包括出现异常）时关闭并释放共享内存；
+    主进程被强制终止时，由 multiprocessing 的 resource_tracker 在退出时回收
+    """
+
+    def __init__(self, grid):
+        rows, cols = grid.shape
+        self.shape = (rows, cols)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(rows * cols, 1))
+
+        # 按行分块写入，内存映射网格不会整张读入普通内存
+        array = np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf)
+        for r0 in range(0, rows, TILE_ROWS):
+            array[r0:r0 + TILE_ROWS] = np.asarray(grid[r0:r0 + TILE_ROWS]) != 0
+        del array  # 释放对共享缓冲区的引用，之后才能关闭
+
+    @property
+    def handle(self):
+        """传给工作进程的句柄 (共享内存名称, 形状)"""
+        return self.shm.name, self.shape
+
+    def close(self):
+        """关闭并释放共享内存块"""
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def attach_grid(handle):
+    """
+    在工作进程中按句柄挂载共享网格，返回直接引用共享内存的uint8数组（零拷贝）；
+    工作进程正常退出时由multiprocessing的进程退出清理关闭所有已挂载的块（见detach_all）
+    """
+    global _FINALIZER_PID
+    name, shape = handle
+    shm = _ATTACHED.get(name)
+    if shm is None:
+        if _FINALIZER_PID != os.getpid():
+            util.Finalize(None, detach_all, exitpriority=10)
+            _FINALIZER_PID = os.getpid()
+        shm = shared_memory.SharedMemory(name=name)
+        _ATTACHED[name] = shm
+    return np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+
+
+def detach_grid(handle):
+    """解除工作进程对共享网格的挂载（长期运行的工作进程在任务结束后调用）"""
+    shm = _ATTACHED.pop(handle[0], None)
+    if shm is not None:
+        shm.close()
+
+
+def detach_all():
+    """关闭本进程挂载的所有共享网格"""
+    while _ATTACHED:
+        _, shm = _ATTACHED.popitem()
+        try:
+            shm.close()
+        except BufferError:
+            # 仍有数组引用该缓冲区，进程退出时由操作系统回收映射
+            pass
@@ -0,0 +1,481 @@
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import signal
+import sys
+from region_path_generator import reap_process
+
+# 默认常驻工作进程数、请求队列容量与单个请求的截止时间（秒）
+DAEMON_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+DAEMON_QUEUE_SIZE = 64
+DAEMON_DEADLINE = 60.0
+DEFAULT_SOCKET_PATH = '/tmp/path_solver.sock'
+
+# 替换工作进程失败（新进程在预热前退出）时，重试前等待的秒数
+RESTART_RETRY_DELAY = 1.0
+
+# 单条JSON-RPC消息（一行）的长度上限，网格较大时请求可达数十MB
+STREAM_LIMIT = 256 * 1024 * 1024
+
+# JSON-RPC 错误码
+ERROR_PARSE = -32700
+ERROR_INVALID_REQUEST = -32600
+ERROR_METHOD_NOT_FOUND = -32601
+ERROR_SOLVE = -32000
+ERROR_BUSY = -32001
+ERROR_DEADLINE = -32002
+ERROR_CANCELLED = -32003
+
+
+class SolverError(Exception):
+    """求解服务返回的JSON-RPC错误"""
+
+    def __init__(self, code, message):
+        super().__init__(f"[{code}] {message}")
+        self.code = code
+        self.message = message
+
+
+def log(message):
+    """服务日志写到stderr，stdio模式下stdout只用于JSON-RPC"""
+    print(message, file=sys.stderr, flush=True)
+
+
+def _warm_worker_main(conn):
+    """常驻工作进程：启动时完成所有导入（cv2、shapely、matplotlib等），之后循环接收solve_path_json请求"""
+    # 独立进程组，超时或取消时可以连同求解中派生的子进程一起终止
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    # 求解过程的打印输出不能混入stdio模式的JSON-RPC流
+    sys.stdout = open(os.devnull, 'w')
+    import path_solver
+    conn.send('ready')
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        try:
+            conn.send(('ok', path_solver.solve_path_json(request)))
+        except Exception as e:
+            conn.send(('error', repr(e)))
+
+
+class WarmWorker:
+    """一个预热的求解工作进程及其管道"""
+
+    def __init__(self):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_warm_worker_main, args=(child_conn,))
+        self.process.start()
+        child_conn.close()
+
+    async def recv(self):
+        """异步等待工作进程的下一条消息（在事件循环上监听管道，不占用线程）"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        fd = self.conn.fileno()
+
+        def on_readable():
+            loop.remove_reader(fd)
+            if future.done():
+                return
+            try:
+                future.set_result(self.conn.recv())
+            except (EOFError, OSError) as e:
+                future.set_exception(e)
+
+        loop.add_reader(fd, on_readable)
+        try:
+            return await future
+        finally:
+            loop.remove_reader(fd)
+
+    def send(self, message):
+        self.conn.send(message)
+
+    def kill(self):
+        """立即终止工作进程及其进程组"""
+        reap_process(self.process)
+        self.conn.close()
+
+    def close(self):
+        """通知工作进程退出，未及时退出时终止"""
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(1)
+        self.kill()
+
+
+class _Job:
+    """排队或运行中的一个求解请求；future完成时即为其JSON-RPC应答（结果或错误）"""
+
+    def __init__(self, key, request, deadline, future):
+        self.key = key
+        self.request = request
+        self.deadline = deadline
+        self.future = future
+
+    def fail(self, code, message):
+        if not self.future.done():
+            self.future.set_result({'error': {'code': code, 'message': message}})
+
+
+class SolverDaemon:
+    """
+    常驻求解服务：预热的工作进程池处理solve_path_json请求，协议为按行分隔的JSON-RPC 2.0
+
+    方法:
+        solve  {"input": solve_path_json的输入（对象或JSON字符串）, "deadline": 秒（可选）} -> {"paths": ...}
+        cancel {"id": 要取消的solve请求id} -> {"cancelled": 是否取消}
+        stats  {} -> 计数与队列状态
+        ping   {} -> "pong"
+
+    请求队列有界，已满时立即返回ERROR_BUSY；排队或求解超过截止时间返回ERROR_DEADLINE，被取消返回ERROR_CANCELLED。
+    运行中的请求超时或被取消时，终止对应工作进程（连同其子进程）并补充一个新的预热进程；
+    工作进程异常退出时当前请求返回ERROR_SOLVE，同样补充新进程。没有id的solve通知不予执行
+    """
+
+    def __init__(self, workers=DAEMON_WORKERS, queue_size=DAEMON_QUEUE_SIZE, deadline=DAEMON_DEADLINE):
+        self.worker_count = workers
+        self.queue_size = queue_size
+        self.deadline = deadline
+        self.workers = []
+        self.queue = None
+        self.jobs = {}  # (连接序号, 请求id) -> _Job
+        self.dispatchers = []
+        self.connection_ids = itertools.count(1)
+        self.stats = {'completed': 0, 'failed': 0, 'rejected': 0, 'timed_out': 0, 'cancelled': 0, 'restarts': 0}
+
+    async def start(self):
+        """启动并预热全部工作进程"""
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.workers = [WarmWorker() for _ in range(self.worker_count)]
+        await asyncio.gather(*(worker.recv() for worker in self.workers))
+        self.dispatchers = [asyncio.create_task(self._dispatch(index)) for index in range(self.worker_count)]
+        log(f"求解服务已启动：{self.worker_count} 个预热工作进程，队列容量 {self.queue_size}")
+
+    async def stop(self):
+        """停止分派，结束排队中的请求并关闭工作进程"""
+        for task in self.dispatchers:
+            task.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        for job in list(self.jobs.values()):
+            job.fail(ERROR_CANCELLED, "求解服务已停止")
+        for worker in self.workers:
+            worker.close()
+        self.workers = []
+
+    async def _restart_worker(self, index):
+        """终止第index个工作进程并换上新的预热进程；新进程在预热完成前退出时等待后重试，直到成功"""
+        while True:
+            self.workers[index].kill()
+            self.workers[index] = WarmWorker()
+            self.stats['restarts'] += 1
+            try:
+                await self.workers[index].recv()
+                return
+            except (EOFError, OSError) as e:
+                log(f"工作进程 {index} 预热失败: {e!r}，{RESTART_RETRY_DELAY} 秒后重试")
+                await asyncio.sleep(RESTART_RETRY_DELAY)
+
+    async def _dispatch(self, index):
+        """第index个工作进程的分派循环：逐个取出请求交给该进程，等待结果、超时或取消"""
+        while True:
+            job = await self.queue.get()
+            if job.future.done():
+                continue  # 排队期间已超时或被取消
+
+            worker = self.workers[index]
+            try:
+                worker.send(job.request)
+            except (BrokenPipeError, EOFError, OSError) as e:
+                # 工作进程已退出：本请求失败，换上新进程后继续分派
+                log(f"向工作进程 {index} 发送请求失败: {e!r}")
+                self.stats['failed'] += 1
+                job.fail(ERROR_SOLVE, "工作进程异常退出")
+                await self._restart_worker(index)
+                continue
+            receive = asyncio.ensure_future(worker.recv())
+            await asyncio.wait({receive, job.future}, return_when=asyncio.FIRST_COMPLETED)
+
+            if receive.done():
+                try:
+                    status, payload = receive.result()
+                except (EOFError, OSError) as e:
+                    log(f"工作进程 {index} 异常退出: {e!r}")
+                    status, payload = 'error', "工作进程异常退出"
+                    await self._restart_worker(index)
+                if job.future.done():
+                    continue  # 结果与超时/取消同时到达，以先完成的为准
+                if status == 'ok':
+                    self.stats['completed'] += 1
+                    job.future.set_result({'result': json.loads(payload)})
+                else:
+                    self.stats['failed'] += 1
+                    job.fail(ERROR_SOLVE, payload)
+            else:
+                # 超时或已取消：结果不再需要，终止正在求解的进程；
+                # 先等接收任务注销管道监听，关闭后的文件描述符可能被新进程的管道复用
+                receive.cancel()
+                await asyncio.wait({receive})
+                await self._restart_worker(index)
+
+    def submit(self, key, request, deadline):
+        """把求解请求放入队列，返回其_Job；队列已满时返回None"""
+        loop = asyncio.get_running_loop()
+        job = _Job(key, request, loop.time() + deadline, loop.create_future())
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.stats['rejected'] += 1
+            return None
+
+        def expire():
+            if not job.future.done():
+                self.stats['timed_out'] += 1
+                job.fail(ERROR_DEADLINE, f"超过截止时间 {deadline} 秒")
+
+        timer = loop.call_at(job.deadline, expire)
+        self.jobs[key] = job
+
+        def finished(_):
+            timer.cancel()
+            self.jobs.pop(key, None)
+
+        job.future.add_done_callback(finished)
+        return job
+
+    def cancel(self, key):
+        """取消排队或运行中的请求"""
+        job = self.jobs.get(key)
+        if job is None or job.future.done():
+            return False
+        self.stats['cancelled'] += 1
+        job.fail(ERROR_CANCELLED, "请求已取消")
+        return True
+
+    async def serve_stream(self, reader, writer):
+        """处理一个连接（Unix套接字连接或stdin/stdout）上的JSON-RPC消息"""
+        connection = next(self.connection_ids)
+        pending = set()
+
+        async def reply(request_id, body):
+            if request_id is None:
+                return  # 通知消息不应答
+            writer.write((json.dumps(dict(body, jsonrpc='2.0', id=request_id)) + '\n').encode('utf-8'))
+            await writer.drain()
+
+        async def reply_when_done(request_id, job):
+            await reply(request_id, await job.future)
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await reply(0, {'error': {'code': ERROR_PARSE, 'message': f"消息超过长度上限 {STREAM_LIMIT} 字节"}})
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError as e:
+                    await reply(0, {'error': {'code': ERROR_PARSE, 'message': f"无法解析JSON: {e}"}})
+                    continue
+                if not isinstance(message, dict) or 'method' not in message:
+                    await reply(message.get('id', 0) if isinstance(message, dict) else 0,
+                                {'error': {'code': ERROR_INVALID_REQUEST, 'message': "无效的请求"}})
+                    continue
+
+                request_id, method = message.get('id'), message['method']
+                params = message.get('params') or {}
+                if method == 'solve' and request_id is None:
+                    # 通知形式的solve既无法返回结果也无法取消，不予执行
+                    log("忽略没有id的solve通知")
+                elif method == 'solve':
+                    request = params.get('input', {})
+                    if not isinstance(request, str):
+                        request = json.dumps(request)
+                    job = self.submit((connection, request_id), request, params.get('deadline') or self.deadline)
+                    if job is None:
+                        await reply(request_id, {'error': {'code': ERROR_BUSY, 'message': "请求队列已满"}})
+                        continue
+                    task = asyncio.create_task(reply_when_done(request_id, job))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                elif method == 'cancel':
+                    await reply(request_id, {'result': {'cancelled': self.cancel((connection, params.get('id')))}})
+                elif method == 'stats':
+                    await reply(request_id, {'result': dict(self.stats, queued=self.queue.qsize(),
+                                                            workers=len(self.workers))})
+                elif method == 'ping':
+                    await reply(request_id, {'result': 'pong'})
+                else:
+                    await reply(request_id, {'error': {'code': ERROR_METHOD_NOT_FOUND, 'message': f"未知方法: {method}"}})
+        except ConnectionError:
+            pass  # 客户端异常断开
+        finally:
+            # 连接断开：取消该连接上尚未完成的请求
+            for key in [key for key in self.jobs if key[0] == connection]:
+                self.cancel(key)
+            await asyncio.gather(*pending, return_exceptions=True)
+            writer.close()
+
+
+def _cancel_on_sigterm():
+    """收到SIGTERM时取消当前任务，使清理代码（关闭工作进程、删除套接字文件）得以执行"""
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+
+
+async def serve_unix(path=DEFAULT_SOCKET_PATH, **daemon_options):
+    """在Unix套接字上运行求解服务，直到被取消"""
+    _cancel_on_sigterm()
+    daemon = SolverDaemon(**daemon_options)
+    await daemon.start()
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(daemon.serve_stream, path, limit=STREAM_LIMIT)
+    log(f"监听 {path}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await daemon.stop()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+async def serve_stdio(**daemon_options):
+    """在stdin/stdout上运行求解服务，stdin关闭时退出"""
+    _cancel_on_sigterm()
+    daemon = SolverDaemon(**daemon_options)
+    await daemon.start()
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=STREAM_LIMIT)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    try:
+        await daemon.serve_stream(reader, writer)
+    finally:
+        await daemon.stop()
+
+
+class SolverClient:
+    """
+    求解服务的异步客户端
+
+    用法:
+        client = await SolverClient.connect('/tmp/path_solver.sock')
+        result = await client.solve({'grid': grid, 'num_regions': 10}, deadline=30)
+        await client.close()
+
+    等待solve的协程被取消（如asyncio.wait_for超时）时，自动向服务发送取消请求
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count(1)
+        self.pending = {}
+        self.reader_task = asyncio.create_task(self._read_responses())
+
+    @classmethod
+    async def connect(cls, path=DEFAULT_SOCKET_PATH):
+        reader, writer = await asyncio.open_unix_connection(path, limit=STREAM_LIMIT)
+        return cls(reader, writer)
+
+    async def _read_responses(self):
+        """按id把应答分发给等待中的请求；连接断开时让所有等待中的请求失败"""
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                future = self.pending.pop(message.get('id'), None)
+                if future is None or future.done():
+                    continue
+                if 'error' in message:
+                    future.set_exception(SolverError(message['error']['code'], message['error']['message']))
+                else:
+                    future.set_result(message.get('result'))
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("与求解服务的连接已断开"))
+            self.pending.clear()
+
+    async def _send(self, message):
+        self.writer.write((json.dumps(dict(message, jsonrpc='2.0')) + '\n').encode('utf-8'))
+        await self.writer.drain()
+
+    async def call(self, method, params=None):
+        """发送一个JSON-RPC请求并等待应答"""
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        await self._send({'id': request_id, 'method': method, 'params': params or {}})
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self.pending.pop(request_id, None)
+            if method == 'solve' and not self.writer.is_closing():
+                # 以通知形式取消服务端的求解，不等待应答
+                await self._send({'method': 'cancel', 'params': {'id': request_id}})
+            raise
+
+    async def solve(self, input_data, deadline=None):
+        """
+        求解一个布局
+
+        参数:
+            input_data: solve_path_json的输入（字典或JSON字符串）
+            deadline: 截止时间（秒），None表示使用服务端默认值
+        返回:
+            {"paths": [...]}，与solve_path_json的输出相同
+        """
+        return await self.call('solve', {'input': input_data, 'deadline': deadline})
+
+    async def stats(self):
+        return await self.call('stats')
+
+    async def ping(self):
+        return await self.call('ping')
+
+    async def close(self):
+        self.writer.close()
+        await self.reader_task
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="路径求解常驻服务（JSON-RPC）")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help="Unix套接字路径")
+    parser.add_argument('--stdio', action='store_true', help="改用stdin/stdout通信")
+    parser.add_argument('--workers', type=int, default=DAEMON_WORKERS, help="预热工作进程数")
+    parser.add_argument('--queue-size', type=int, default=DAEMON_QUEUE_SIZE, help="请求队列容量")
+    parser.add_argument('--deadline', type=float, default=DAEMON_DEADLINE, help="默认截止时间（秒）")
+    args = parser.parse_args(argv)
+
+    options = {'workers': args.workers, 'queue_size': args.queue_size, 'deadline': args.deadline}
+    try:
+        if args.stdio:
+            asyncio.run(serve_stdio(**options))
+        else:
+            asyncio.run(serve_unix(args.socket, **options))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import io
+import contextlib
+import numpy as np
+import pytest
+from batch_divider import BatchRegionDivider
+from path_solver import LayoutFromGrid, build_strip_division
+from region_path_generator import RegionPathGenerator
+from tests.test_readme_layouts import load_layout
+
+
+def perturbed_layouts(name, count=12, seed=0):
+    """在README布局内部随机加入小块障碍物，得到一批同尺寸布局（第一个为原布局）"""
+    base = load_layout(name)
+    rng = np.random.default_rng(seed)
+    grids = np.repeat(base[None], count, axis=0)
+    for grid in grids[1:]:
+        for _ in range(rng.integers(0, 6)):
+            r, c = rng.integers(2, base.shape[0] - 4), rng.integers(2, base.shape[1] - 4)
+            grid[r:r + rng.integers(1, 4), c:c + rng.integers(1, 4)] = 1
+    return grids
+
+
+def divide(grids, num_regions):
+    with contextlib.redirect_stdout(io.StringIO()):
+        divider = BatchRegionDivider(grids, chunk_size=5)
+        return divider, divider.divide(num_regions)
+
+
+def strip_division(grid, num_regions):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return build_strip_division(LayoutFromGrid(grid), num_regions)
+
+
+@pytest.mark.parametrize('num_regions', [8, 10])
+def test_batch_division_matches_strip_division(num_regions):
+    """批量划分（分块计算）与逐个布局的build_strip_division划分结果相同"""
+    grids = perturbed_layouts('round')
+    divider, result = divide(grids, num_regions)
+    for index, grid in enumerate(grids):
+        _, vertical, horizontal, _, _ = strip_division(grid, num_regions)
+        assert divider.division(result, index) == (vertical, [tuple(map(int, h)) for h in horizontal])
+
+
+@pytest.mark.parametrize('num_regions', [8, 10, 14])
+def test_batch_endpoints_match_endpoint_generator(num_regions):
+    """边界与分隔线只相交于孤立点时，由批量交点得到的端点与PathEndpointGenerator相同"""
+    grids = perturbed_layouts('round')
+    divider, result = divide(grids, num_regions)
+    for index, grid in enumerate(grids):
+        assert divider.endpoints(result, index) == strip_division(grid, num_regions)[4]
+
+
+def test_batch_endpoints_use_real_crossings_on_collinear_boundary():
+    """汽车布局8个区域时轮廓有一段与x=14的分隔线重合：逐个布局丢失交点取回退行，批量端点取该列真实的最上方有效网格"""
+    grid = load_layout('car')
+    divider, result = divide(grid[None], 8)
+    endpoints = {(e['region'], e['subregion']): e for e in divider.endpoints(result, 0)}
+    top = np.flatnonzero(grid[:, 14] == 0).max()
+    assert endpoints[(1, 'upper')]['end'] == (14.0, float(top))
+    assert endpoints[(2, 'upper')]['start'] == (14.0, float(top))
+
+
+def test_subregion_areas_follow_region_path_generator_labels():
+    """subregion_areas的[..., 0]/[..., 1]为RegionPathGenerator的'upper'（行号不小于分隔线）/'lower'"""
+    grids = perturbed_layouts('car', count=4)
+    divider, result = divide(grids, 10)
+    for index, grid in enumerate(grids):
+        valid = grid == 0
+        vertical, horizontal = divider.division(result, index)
+        bounds = [0] + vertical + [grid.shape[1]]
+        for k, (x_min, x_max, y_pos) in enumerate(horizontal):
+            assert (x_min, x_max) == (bounds[k], bounds[k + 1])
+            upper, lower = result['subregion_areas'][index, k]
+            assert upper == valid[y_pos:, x_min:x_max].sum()
+            assert lower == valid[:y_pos, x_min:x_max].sum()
+
+
+def test_batch_division_solves_without_endpoint_generator():
+    """build_strip_division的结果直接接入RegionPathGenerator求解，每个子区域都有路径"""
+    grids = perturbed_layouts('round', count=3)
+    divider, result = divide(grids, 10)
+    with contextlib.redirect_stdout(io.StringIO()):
+        region_divider, vertical, horizontal, endpoint_generator, endpoints = divider.build_strip_division(result, 2)
+        generator = RegionPathGenerator(region_divider.layout_manager, region_divider, endpoint_generator)
+        paths = generator.generate_all_region_paths(vertical, horizontal, endpoints)
+    assert endpoint_generator is None
+    assert len(paths) == len(endpoints) == 10
+    assert all(len(path) > 0 for path in paths)
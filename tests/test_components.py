@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from path_solver import allocate_regions, solve_layout
+
+
+def walled_grid(left_cols, right_cols, rows=20):
+    """外围一圈障碍物、中间一道墙隔开的两个房间，内部分别为rows×left_cols和rows×right_cols个网格"""
+    grid = np.ones((rows + 2, left_cols + right_cols + 3), dtype=np.uint8)
+    grid[1:-1, 1:1 + left_cols] = 0
+    grid[1:-1, 2 + left_cols:-1] = 0
+    return grid
+
+
+@pytest.mark.parametrize('areas, num_regions', [
+    ([100], 10), ([500, 300, 200], 10), ([900, 50, 50], 10), ([400, 400, 1], 3),
+    ([300, 200, 100, 50], 2), ([10, 10, 10, 10, 10, 10], 4), ([1000, 3, 2, 1], 5),
+])
+def test_allocate_regions_sums_to_num_regions(areas, num_regions):
+    """分配给各连通分量的区域数之和恰好为num_regions；分量足够少时每个分量至少1个"""
+    counts = allocate_regions(areas, num_regions)
+    assert len(counts) == len(areas)
+    assert sum(counts) == num_regions
+    assert min(counts) >= (1 if len(areas) <= num_regions else 0)
+
+
+@pytest.mark.parametrize('left_cols, right_cols, num_regions', [(15, 15, 6), (30, 10, 4), (20, 12, 8)])
+def test_walled_layout_path_count_matches_num_regions(left_cols, right_cols, num_regions):
+    """被墙隔开的布局按条带数分配区域，管道总数等于num_regions"""
+    result = solve_layout(walled_grid(left_cols, right_cols), num_regions)
+    assert len(result['components']) == 2
+    assert all(component['num_regions'] % 2 == 0 for component in result['components'])
+    assert sum(component['num_regions'] for component in result['components']) == num_regions
+    assert len(result['paths']) == num_regions
@@ -0,0 +1,23 @@
+import io
+import contextlib
+import numpy as np
+from path_solver import LayoutFromGrid
+from region_divider import RegionDivider
+from region_points_generator import PathEndpointGenerator, outer_boundary_mask
+
+
+def test_candidates_skip_cells_next_to_interior_holes():
+    """候选端点只取外边界网格：子区域把孔洞切开时，孔洞边缘的网格也不能当作外边界"""
+    grid = np.zeros((20, 20), dtype=np.uint8)
+    grid[8:12, 8:12] = 1
+    with contextlib.redirect_stdout(io.StringIO()):
+        layout = LayoutFromGrid(grid)
+        divider = RegionDivider(layout)
+        generator = PathEndpointGenerator(layout, divider)
+    outer = outer_boundary_mask(divider.valid_grid)
+
+    pairs = generator.candidate_endpoint_pairs(0, 10, 0, 20, (0, 0), (9, 19), count=40)
+    assert len(pairs) > 1
+    for start, end in pairs[1:]:
+        for x, y in (start, end):
+            assert outer[y, x], (x, y)
@@ -0,0 +1,175 @@
+import numpy as np
+import pytest
+from path_algorithm import ObstacleAwareLongestPath, RESTART_MAX_COUNT
+from engine_selector import SELECTION_COVERAGE
+
+# 小网格用例：(rows, cols, 障碍物, 起点, 终点)
+CASES = [
+    (3, 3, [], (0, 0), (2, 2)),
+    (3, 4, [], (0, 0), (2, 0)),
+    (4, 4, [], (0, 0), (0, 3)),
+    (4, 4, [(1, 1)], (0, 0), (3, 3)),
+    (4, 5, [(1, 2), (2, 2)], (0, 0), (3, 4)),
+    (3, 5, [(1, 1)], (0, 0), (2, 4)),
+    (5, 4, [(2, 1), (2, 2)], (0, 0), (4, 0)),
+    (4, 4, [], (0, 0), (3, 3)),  # 起终点同色，不存在哈密顿路径
+    (3, 4, [], (0, 0), (0, 3)),
+    (2, 5, [], (0, 0), (1, 4)),
+    (5, 5, [], (0, 0), (4, 4)),
+    (4, 6, [(0, 5)], (0, 0), (3, 5)),
+]
+
+# 结果须为不经过障碍物的简单路径、到达终点时不超过穷举最长路径的引擎
+ENGINES = ('hamilton_restart', 'bidirectional', 'stc', 'frontier')
+
+# 要求覆盖全部可通行网格时，存在哈密顿路径则一定能找到的完备搜索引擎
+COMPLETE_ENGINES = ('hamilton', 'hamilton_restart', 'bidirectional')
+
+
+def brute_force_longest(rows, cols, obstacles, start, target):
+    """穷举从起点到终点的所有简单路径，返回最长路径的网格数（不可达为0）"""
+    blocked = np.zeros((rows, cols), dtype=bool)
+    for cell in obstacles:
+        blocked[cell] = True
+    best = 0
+
+    def dfs(cell, length):
+        nonlocal best
+        if cell == target:
+            best = max(best, length)
+            return
+        i, j = cell
+        for ni, nj in ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1)):
+            if 0 <= ni < rows and 0 <= nj < cols and not blocked[ni, nj]:
+                blocked[ni, nj] = True
+                dfs((ni, nj), length + 1)
+                blocked[ni, nj] = False
+
+    blocked[start] = True
+    dfs(start, 1)
+    return best
+
+
+def free_cells(rows, cols, obstacles):
+    return rows * cols - len(obstacles)
+
+
+def make_solver(case, **kwargs):
+    rows, cols, obstacles, start, target = case
+    return ObstacleAwareLongestPath(rows, cols, obstacles, start, target, **kwargs)
+
+
+def random_cases(count, seed=0, density=0.15):
+    """随机小网格用例，起终点为任意两个不同的可通行网格"""
+    rng = np.random.default_rng(seed)
+    cases = []
+    while len(cases) < count:
+        rows, cols = int(rng.integers(2, 9)), int(rng.integers(2, 9))
+        blocked = rng.random((rows, cols)) < density
+        free = np.argwhere(~blocked)
+        if len(free) < 2:
+            continue
+        a, b = rng.choice(len(free), 2, replace=False)
+        obstacles = [tuple(map(int, cell)) for cell in np.argwhere(blocked)]
+        cases.append((rows, cols, obstacles, tuple(map(int, free[a])), tuple(map(int, free[b]))))
+    return cases
+
+
+@pytest.mark.parametrize('case', CASES)
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engine_paths_are_feasible_and_bounded(case, engine):
+    """引擎结果都是不经过障碍物的简单路径，到达终点时长度不超过穷举得到的最长路径"""
+    solver = make_solver(case)
+    path = solver.run_engine(engine)
+    assert solver.is_clear_path(path)
+    if solver.is_feasible_path(path):
+        assert len(path) <= brute_force_longest(*case)
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_frontier_matches_brute_force(case):
+    """轮廓动态规划是精确算法，最长路径长度与穷举相同"""
+    solver = make_solver(case)
+    path = solver.run_engine('frontier')
+    optimum = brute_force_longest(*case)
+    assert solver.is_feasible_path(path)
+    assert len(path) == optimum
+
+
+@pytest.mark.parametrize('case', CASES)
+@pytest.mark.parametrize('engine', COMPLETE_ENGINES)
+def test_complete_engines_find_hamiltonian_paths(case, engine):
+    """存在覆盖全部可通行网格的路径时，完备搜索引擎在100%覆盖目标下能找到它"""
+    optimum = brute_force_longest(*case)
+    if optimum != free_cells(*case[:3]):
+        pytest.skip("不存在哈密顿路径")
+    solver = make_solver(case, min_coverage=100)
+    path = solver.run_engine(engine)
+    assert solver.is_feasible_path(path)
+    assert len(path) == optimum
+
+
+def test_stc_attaches_start_without_passing_target():
+    """起点连接回路时不能经过终点，否则终点在路径中出现两次"""
+    solver = make_solver((2, 5, [(0, 3)], (1, 3), (1, 2)))
+    path = solver.run_engine('stc')
+    assert len(np.unique(path, axis=0)) == len(path)
+
+
+def test_stc_paths_have_no_repeated_cells():
+    """随机小网格上生成树覆盖路径不重复经过网格、不经过障碍物"""
+    for case in random_cases(500):
+        solver = make_solver(case)
+        path = solver.run_engine('stc')
+        assert len(np.unique(path, axis=0)) == len(path), case
+        assert solver.is_clear_path(path), case
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_hamilton_restart_targets_selection_coverage(case):
+    """未设置覆盖率目标时，覆盖率低于SELECTION_COVERAGE就继续重启，用尽重启次数后返回最长的路径"""
+    solver = make_solver(case)
+    path = solver.run_engine('hamilton_restart')
+    single = make_solver(case).hamilton_restart_path(max_restarts=1)
+    assert solver.is_feasible_path(path)
+    assert len(path) >= len(single)
+    coverage = len(path) / solver.available_grids * 100
+    assert coverage >= SELECTION_COVERAGE or solver.search_stats['restarts'] == RESTART_MAX_COUNT
+
+
+@pytest.mark.parametrize('case', CASES)
+@pytest.mark.parametrize('strategy', ['auto', 'portfolio'])
+def test_selection_strategies_return_feasible_paths(case, strategy):
+    """代价模型选择和组合求解都返回到达终点的路径，且不超过穷举的最长路径"""
+    solver = make_solver(case)
+    path = solver.generate_longest_path(strategy)
+    assert solver.is_feasible_path(path)
+    assert len(path) <= brute_force_longest(*case)
+
+
+def test_auto_fallback_avoids_obstacles():
+    """起点到不了终点时，auto策略的尽力而为路径不经过障碍物，并记录失败"""
+    solver = make_solver((3, 3, [(0, 1), (1, 0), (1, 1)], (0, 0), (2, 2)))
+    path = solver.generate_longest_path('auto')
+    assert solver.search_stats['feasible'] is False
+    assert solver.search_stats['fallback'] in ('stc', 'meander', None)
+    assert len(path) == 0 or solver.is_clear_path(path)
+    assert not solver.grid[path[:, 0], path[:, 1]].any()
+
+
+def test_auto_results_never_cross_obstacles():
+    """随机小网格上auto策略的结果（包括尽力而为的路径）都不经过障碍物"""
+    for case in random_cases(300, seed=1):
+        solver = make_solver(case)
+        path = solver.generate_longest_path('auto')
+        assert len(path) == 0 or solver.is_clear_path(path), case
+
+
+def test_portfolio_worker_reports_failures():
+    """组合求解的工作进程出现任何异常都上报空结果，主进程不必等到截止时间"""
+    import queue
+    from path_algorithm import _portfolio_worker
+    result_queue = queue.Queue()
+    _portfolio_worker(3, 3, [], (0, 0), (2, 2), None, None, 'no_such_engine', result_queue)
+    strategy, path = result_queue.get_nowait()
+    assert strategy == 'no_such_engine' and len(path) == 0
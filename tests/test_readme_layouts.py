@@ -0,0 +1,35 @@
+import json
+import os
+import numpy as np
+import pytest
+from path_metrics import layout_metrics, path_cells
+from path_solver import solve_path
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+# README示例布局各区域数下的最低总覆盖率(%)
+MIN_COVERAGE = 85.0
+
+
+def load_layout(name):
+    with open(os.path.join(DATA_DIR, f'{name}_layout.json')) as f:
+        return np.array(json.load(f), dtype=np.uint8)
+
+
+@pytest.mark.parametrize('num_regions', [8, 10])
+@pytest.mark.parametrize('name', ['round', 'car'])
+def test_readme_layout(name, num_regions):
+    """
+    README中的圆形和汽车布局：每个子区域都有路径、总覆盖率不低于MIN_COVERAGE，
+    路径连续且不重复经过网格；端点取在分隔线与边界的交点上，可能落在边界网格，只检查中间网格不经过障碍物
+    """
+    grid = load_layout(name)
+    paths = solve_path(grid, num_regions)
+    metrics = layout_metrics(grid, paths)
+    assert len(paths) == num_regions
+    assert metrics['coverage'] >= MIN_COVERAGE
+    for path in paths:
+        cells = path_cells(path)
+        assert np.all(np.abs(np.diff(cells, axis=0)).sum(axis=1) == 1)
+        assert len(np.unique(cells, axis=0)) == len(cells)
+        assert not grid[cells[1:-1, 0], cells[1:-1, 1]].any()
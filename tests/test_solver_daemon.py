@@ -0,0 +1,72 @@
+import asyncio
+import os
+import signal
+import pytest
+from solver_daemon import SolverClient, SolverError, serve_unix
+
+GRID = [[0] * 6 for _ in range(4)]
+
+
+async def _start_daemon(path):
+    server = asyncio.create_task(serve_unix(path, workers=1, queue_size=4, deadline=30))
+    for _ in range(300):
+        if os.path.exists(path):
+            break
+        await asyncio.sleep(0.1)
+    return server
+
+
+async def _stop_daemon(server):
+    server.cancel()
+    try:
+        await server
+    except asyncio.CancelledError:
+        pass
+
+
+def test_round_trip_survives_worker_crash(tmp_path):
+    """求解请求往返；工作进程崩溃后当前请求返回错误，服务补充新进程并继续处理后续请求"""
+    path = str(tmp_path / 'solver.sock')
+
+    async def scenario():
+        server = await _start_daemon(path)
+        client = await SolverClient.connect(path)
+        try:
+            assert await client.ping() == 'pong'
+            result = await client.solve({'grid': GRID, 'num_regions': 2})
+            assert len(result['paths']) == 2
+
+            # 杀掉唯一的预热工作进程，模拟崩溃
+            for child in _child_pids():
+                os.kill(child, signal.SIGKILL)
+            await asyncio.sleep(0.3)
+            with pytest.raises(SolverError):
+                await client.solve({'grid': GRID, 'num_regions': 2})
+
+            result = await client.solve({'grid': GRID, 'num_regions': 2})
+            assert len(result['paths']) == 2
+            stats = await client.stats()
+            assert stats['restarts'] >= 1 and stats['workers'] == 1
+        finally:
+            await client.close()
+            await _stop_daemon(server)
+
+    asyncio.run(scenario())
+    assert not os.path.exists(path)
+
+
+def _child_pids():
+    """当前进程的直接子进程（Linux /proc）"""
+    me = os.getpid()
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == me:
+            children.append(int(entry))
+    return children
@@ -0,0 +1,25 @@
+import io
+import contextlib
+import pytest
+from path_solver import LayoutFromGrid, build_strip_division
+from tests.test_readme_layouts import load_layout
+
+
+def strip_endpoints(name, num_regions):
+    """竖向条带划分布局，返回(竖向分隔线, {(区域, 子区域): 端点字典})"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, vertical, _, _, endpoints = build_strip_division(LayoutFromGrid(load_layout(name)), num_regions)
+    return vertical, {(e['region'], e['subregion']): e for e in endpoints}
+
+
+@pytest.mark.parametrize('num_regions', [8, 10, 14])
+def test_right_boundary_handling_applies_to_last_strip(num_regions):
+    """最右侧条带（而非固定的区域5）的上下子区域在右边界共享端点，中间条带从左向右"""
+    vertical, endpoints = strip_endpoints('round', num_regions)
+    last = len(vertical) + 1
+    assert last == (num_regions + 1) // 2
+    assert endpoints[(last, 'upper')]['end'] == endpoints[(last, 'lower')]['start']
+    for region in range(2, last):
+        for subregion in ('upper', 'lower'):
+            start, end = endpoints[(region, subregion)]['start'], endpoints[(region, subregion)]['end']
+            assert start[0] < end[0]